@@ -6,7 +6,7 @@ import json
 import builtins
 from autogen_core.model_context import BufferedChatCompletionContext
 from autogen_agentchat.agents import AssistantAgent, UserProxyAgent, CodeExecutorAgent
-from autogen_agentchat.conditions import TextMentionTermination,MaxMessageTermination
+from autogen_agentchat.conditions import TextMentionTermination,MaxMessageTermination,TimeoutTermination,TokenUsageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.teams import SelectorGroupChat
 from autogen_agentchat.ui import Console
@@ -132,7 +132,8 @@ async def main() -> None:
     
         
     text_mention_termination = TextMentionTermination("TERMINATE")
-    termination = text_mention_termination
+    budget_termination = TokenUsageTermination(max_total_token=60000) | TimeoutTermination(timeout_seconds=300)
+    termination = text_mention_termination | budget_termination
 
     #Create a team of agents to work together to complete the task.
     agent_team = RoundRobinGroupChat(
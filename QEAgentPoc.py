@@ -3,8 +3,10 @@ from pathlib import Path
 import os
 import json
 import builtins
+import re
+from typing import Sequence
 from autogen_agentchat.agents import AssistantAgent, UserProxyAgent, CodeExecutorAgent
-from autogen_agentchat.conditions import TextMentionTermination,MaxMessageTermination
+from autogen_agentchat.conditions import TextMentionTermination,MaxMessageTermination,TimeoutTermination,TokenUsageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.teams import SelectorGroupChat
 from autogen_agentchat.ui import Console
@@ -13,7 +15,11 @@ from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_core.memory import ListMemory, MemoryContent, MemoryMimeType
 from autogen_core.tools import FunctionTool 
 from autogen_core import CancellationToken
-from autogen_agentchat.messages import TextMessage 
+from autogen_agentchat.messages import TextMessage, BaseAgentEvent, BaseChatMessage
+import sys
+# Local ISTQB pre-screen for the reviewer, shared with the src workflow
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+from istqb_rules import PrescreenedReviewer
 # from autogen_agentchat.agents import user_proxy_agent, assistant_agent   
 
 
@@ -39,15 +45,58 @@ class SimpleLocalCommandLineCodeExecutor(LocalCommandLineCodeExecutor):
         # no-op shutdown; implement real shutdown logic if needed
         return None
 
-async def main() -> None:
+#Picks the next speaker locally for the predictable transitions, so SelectorGroupChat only
+#asks the model when the conversation state is ambiguous (selector_func returning None).
+class TransitionSelector:
+    def __init__(self, transitions: dict[str, str], keywords: dict[str, dict[str, str]] | None = None):
+        # transitions: last speaker -> next speaker
+        # keywords: last speaker -> {keyword in their message: next speaker}; exactly one must match
+        self.transitions = transitions
+        self.keywords = {
+            speaker: [(re.compile(rf"\b{re.escape(word)}\b", re.IGNORECASE), target) for word, target in rules.items()]
+            for speaker, rules in (keywords or {}).items()
+        }
+        self.decided = 0
+        self.fallbacks = 0
+        self._thread_length = 0
+
+    def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> str | None:
+        # A shorter thread than last time means the team was reset: start counting a new run
+        if len(messages) < self._thread_length:
+            self.decided = self.fallbacks = 0
+        self._thread_length = len(messages)
+
+        last = next((m for m in reversed(messages) if isinstance(m, BaseChatMessage)), None)
+        choice = None
+        if last is not None and last.source in self.keywords:
+            text = last.to_model_text()
+            targets = {target for pattern, target in self.keywords[last.source] if pattern.search(text)}
+            if len(targets) == 1:
+                choice = targets.pop()
+        elif last is not None:
+            choice = self.transitions.get(last.source)
+
+        if choice is None:
+            self.fallbacks += 1
+        else:
+            self.decided += 1
+        return choice
+
+    def summary(self) -> str:
+        return f"Speaker selection: {self.decided} decided locally, {self.fallbacks} model selector calls"
+
+
+def default_selector() -> TransitionSelector:
+    # TestManager -> writer -> reviewer; the reviewer's SUGGESTIONS go back to the writer
+    # (APPROVED ends the run through the termination condition).
+    return TransitionSelector(
+        {"user": "TestManager", "TestManager": "test_case_writer", "test_case_writer": "test_case_reviewer"},
+        keywords={"test_case_reviewer": {"SUGGESTIONS": "test_case_writer"}},
+    )
 
-    
-       # 2. Wrap the function with FunctionTool.
-    # get_functional_tool = FunctionTool(
-    # main,
-    # description="Tool to get User requirements.",
-# )
-    model_client = OpenAIChatCompletionClient(model="gpt-4o-mini")
+
+#Builds the selector team; split out of main() so benchmarks can drive it with a fake model client.
+def build_team(model_client, input_func=custom_input, selector: TransitionSelector | None = None) -> SelectorGroupChat:
 
      # Define your user proxy agent (human in the loop)
     # user_proxy_agent.system_message = "My custom message."
@@ -62,7 +111,7 @@ async def main() -> None:
         "TestManager",
         # model_client=model_client,
         # tools=[get_functional_tool],
-        input_func=custom_input,
+        input_func=input_func,
         # tools=[],
         # system_message=
         #     "You are a TestManager. Take clear requirements from the user "
@@ -109,6 +158,9 @@ async def main() -> None:
             "Once APPROVED is sent, Reply 'TERMINATE' to end the conversation."
         ),
     )
+    # Mechanical guideline failures (IDs, step count, vague results, preconditions)
+    # go straight back to the writer; only clean suites cost a reviewer model turn
+    test_case_reviewer = PrescreenedReviewer(test_case_reviewer)
 
 
 
@@ -127,8 +179,12 @@ async def main() -> None:
     
     # coder.initiate_chat(user_proxy, message="Provide your requirement to get user story and acceptance criteria.")
     text_mention_termination = TextMentionTermination("TERMINATE")
-    max_messages_termination = MaxMessageTermination(max_messages=4)
-    termination = text_mention_termination | max_messages_termination
+    # Stop on the reviewer's approval rather than after a fixed 4 messages, which cut
+    # review loops off mid-way; the message, token and time limits cap runaway loops.
+    approved_termination = TextMentionTermination("APPROVED", sources=["test_case_reviewer"])
+    max_messages_termination = MaxMessageTermination(max_messages=12)
+    budget_termination = TokenUsageTermination(max_total_token=60000) | TimeoutTermination(timeout_seconds=300)
+    termination = approved_termination | text_mention_termination | max_messages_termination | budget_termination
     # termination = TextMentionTermination("exit", sources=["user"])
     # agent_team = RoundRobinGroupChat(
     #     # [user, coder, test_case_writer, test_case_reviewer], termination_condition=termination,
@@ -140,11 +196,26 @@ async def main() -> None:
         # [user, coder, test_case_writer, test_case_reviewer], termination_condition=termination,
        [TestManager, test_case_writer, test_case_reviewer], termination_condition=termination,
        model_client=model_client,
+       # Rule-based selection first; the model is only asked when the rules cannot decide
+       selector_func=selector or default_selector(),
 
 
     # termination_condition=max_messages_termination,
     )
+    return agent_team
+
+
+async def main() -> None:
+
     
+       # 2. Wrap the function with FunctionTool.
+    # get_functional_tool = FunctionTool(
+    # main,
+    # description="Tool to get User requirements.",
+# )
+    model_client = OpenAIChatCompletionClient(model="gpt-4o-mini")
+    selector = default_selector()
+    agent_team = build_team(model_client, selector=selector)
         
     
 
@@ -167,6 +238,7 @@ async def main() -> None:
             # output_stats=True,
         )
     finally:
+        print(selector.summary())
         await model_client.close()
 
         # Export the agent configuration to a JSON file
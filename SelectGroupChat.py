@@ -5,7 +5,6 @@ import os
 print("Current working directory:", os.getcwd())
 import json
 import builtins
-from autogen_core.model_context import BufferedChatCompletionContext
 from autogen_agentchat.agents import AssistantAgent, UserProxyAgent, CodeExecutorAgent
 from autogen_agentchat.conditions import TextMentionTermination,MaxMessageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
@@ -17,6 +16,12 @@ from autogen_ext.models.ollama import OllamaChatCompletionClient
 from autogen_core.memory import ListMemory, MemoryContent, MemoryMimeType
 from autogen_core.tools import FunctionTool 
 from datetime import datetime
+import sys
+# Local ISTQB pre-screen for the reviewer, shared with the src workflow
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+from context_policy import build_model_context
+from istqb_rules import PrescreenedReviewer
+from model_clients import load_config
 # from autogen_agentchat.agents import user_proxy_agent, assistant_agent   
 
 
@@ -57,18 +62,10 @@ class SimpleLocalCommandLineCodeExecutor(LocalCommandLineCodeExecutor):
         # no-op shutdown; implement real shutdown logic if needed
         return None
 
-async def main() -> None:
-
-    
-       # 2. Wrap the function with FunctionTool.
-    # get_functional_tool = FunctionTool(
-    # main,
-    # description="Tool to get User requirements.",
-# )
-#gpt-5-nano gpt-4o-mini
-    model_client = OpenAIChatCompletionClient(model="gpt-5-nano", temperature=1)
-    # model_client = OllamaChatCompletionClient(model="llama3", temperature=0)
-    model_context = BufferedChatCompletionContext(buffer_size=5)
+#Builds the round-robin team; split out of main() so benchmarks can drive it with a fake model client.
+def build_team(model_client, input_func=custom_input) -> RoundRobinGroupChat:
+    # Per-agent model contexts from context_policy in src/config.json
+    config = load_config()
 
      # Define your user proxy agent (human in the loop)
     # user_proxy_agent.system_message = "My custom message."
@@ -84,7 +81,7 @@ async def main() -> None:
         # model_client=model_client,
         # # tools=[get_functional_tool],
         # tools=[],
-        input_func=custom_input,
+        input_func=input_func,
         description=
             "You are a TestManager. Take clear requirements from the user only once"
             "Create UserStory and Acceptance Criteria from the given requirements"
@@ -105,6 +102,7 @@ async def main() -> None:
     test_case_writer = AssistantAgent(
             "test_case_writer",
             model_client=model_client,  # lets it narrate results
+            model_context=build_model_context("test_case_writer", config, model_client),
             # code_executor=SimpleLocalCommandLineCodeExecutor(work_dir=Path.cwd() / "runs"),
             system_message=(
                 "You are a skilled test case writer. Your task is to create detailed and effective test cases in csv format "
@@ -147,6 +145,7 @@ async def main() -> None:
     test_case_reviewer = AssistantAgent(
         "test_case_reviewer",
         model_client=model_client,
+        model_context=build_model_context("test_case_reviewer", config, model_client),
         # is_termination_msg=termination_msg,
         # human_input_mode="NEVER",
         system_message=("You are a meticulous test case reviewer. Your task is to review the test cases created by the test_case_writer. "
@@ -158,10 +157,14 @@ async def main() -> None:
             "Reply with either APPROVED or SUGGESTIONS for changes."
         ),
     )
+    # Mechanical guideline failures (IDs, step count, vague results, preconditions)
+    # go straight back to the writer; only clean suites cost a reviewer model turn
+    test_case_reviewer = PrescreenedReviewer(test_case_reviewer)
 
     bdd_coder = AssistantAgent(
         "bdd_coder",
         model_client=model_client,
+        model_context=build_model_context("bdd_coder", config, model_client),
         # is_termination_msg=termination_msg,
         # human_input_mode="NEVER",
         system_message=("You are an expert BDD Coder who writes step definitions in Python using the 'behave' library syntax. "
@@ -217,6 +220,21 @@ async def main() -> None:
 
     # termination_condition=max_messages_termination,
     )
+    return agent_team
+
+
+async def main() -> None:
+
+    
+       # 2. Wrap the function with FunctionTool.
+    # get_functional_tool = FunctionTool(
+    # main,
+    # description="Tool to get User requirements.",
+# )
+#gpt-5-nano gpt-4o-mini
+    model_client = OpenAIChatCompletionClient(model="gpt-5-nano", temperature=1)
+    # model_client = OllamaChatCompletionClient(model="llama3", temperature=0)
+    agent_team = build_team(model_client)
     
     # user_proxy.run("I need a user story and acceptance criteria for a login feature.")
     # user_proxy.initiate_chat(group_chat_manager,"I need a user story and acceptance criteria for a login feature.")
@@ -0,0 +1,142 @@
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+
+# ----------------------------
+# ATOMIC WRITER
+# ----------------------------
+class ArtifactWriter:
+    """
+    Streams one artifact to a temp file next to its final path and renames it
+    into place on commit, so readers never see a half-written file. Used as a
+    context manager: a clean exit commits, an exception discards the temp file.
+    """
+
+    def __init__(self, store: "ArtifactStore", path: Path, kind: str):
+        self._store = store
+        self.path = path
+        self.kind = kind
+        self.rows = 0
+        self._tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        self._file = self._tmp.open("w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self)  # rows go through write() so the hash and size stay in sync
+        self._sha256 = hashlib.sha256()
+        self._bytes = 0
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._sha256.update(data)
+        self._bytes += len(data)
+        self._file.write(text)
+
+    def writerow(self, row: Sequence) -> None:
+        self._csv.writerow(row)
+        self.rows += 1
+
+    def writerows(self, rows: Iterable[Sequence]) -> None:
+        for row in rows:
+            self.writerow(row)
+
+    def commit(self) -> Path:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        self._store._record(self, self._sha256.hexdigest(), self._bytes)
+        return self.path
+
+    def discard(self) -> None:
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+# ----------------------------
+# RUN-SCOPED STORE
+# ----------------------------
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class ArtifactStore:
+    """
+    The artifacts of one workflow run, under outputs/<timestamp>_<run_id>/.
+
+    Every run gets its own folder and names are de-duplicated within the run,
+    so concurrent or batch runs never overwrite each other's files. Each commit
+    appends one line (name, kind, size, sha256, rows) to the folder's
+    manifest.jsonl, so the manifest costs the same per artifact however many a
+    run writes. Tools run in worker threads, so reserving names and appending
+    to the manifest are serialised with a lock. Callbacks registered with
+    on_commit(kind, ...) see each committed artifact of that kind.
+    """
+
+    def __init__(self, root: Path, run_id: str | None = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_dir = root / f"{ts}_{self.run_id}"
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._reserved: set[Path] = set()
+        self._entries: list[dict] = []
+        self.manifest_path = self.run_dir / "manifest.jsonl"
+        self._callbacks: list[tuple[str, Callable[[Path, str], None]]] = []
+
+    def on_commit(self, kind: str, callback: Callable[[Path, str], None]) -> None:
+        """Calls callback(path, run_id) after every committed artifact of `kind`."""
+        self._callbacks.append((kind, callback))
+
+    def open(self, name: str, kind: str) -> ArtifactWriter:
+        """Starts streaming a new artifact. `name` may include sub-folders (e.g. java/StepDefinition.java)."""
+        parts = [_UNSAFE.sub("_", p) for p in Path(name).parts if p not in ("", ".", "..")]
+        path = self.run_dir.joinpath(*parts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            stem, suffix, n = path.stem, path.suffix, 1
+            while path in self._reserved or path.exists():
+                n += 1
+                path = path.with_name(f"{stem}_{n}{suffix}")
+            self._reserved.add(path)
+        return ArtifactWriter(self, path, kind)
+
+    def write_text(self, name: str, content: str, kind: str) -> Path:
+        with self.open(name, kind) as writer:
+            writer.write(content)
+        return writer.path
+
+    def _record(self, writer: ArtifactWriter, sha256: str, size: int) -> None:
+        entry = {
+            "name": str(writer.path.relative_to(self.run_dir)),
+            "kind": writer.kind,
+            "bytes": size,
+            "sha256": sha256,
+            "rows": writer.rows or None,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            with self.manifest_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"run_id": self.run_id, **entry}) + "\n")
+        for kind, callback in self._callbacks:
+            if kind == writer.kind:
+                callback(writer.path, self.run_id)
+
+    @property
+    def artifacts(self) -> list[dict]:
+        with self._lock:
+            return list(self._entries)
@@ -0,0 +1,85 @@
+import asyncio
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+from autogen_workflow import run_autogen_workflow
+
+
+# ----------------------------
+# JOBS
+# ----------------------------
+class WorkflowJob:
+    """Handle for one submitted workflow run. Messages are read back with poll()."""
+
+    def __init__(self, job_id: int):
+        self.id = job_id
+        self.error: BaseException | None = None
+        self._messages: queue.Queue = queue.Queue()
+        self._done = threading.Event()
+        self._future: Future | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set() and self._messages.empty()
+
+    def poll(self, timeout: float = 0.1) -> list[dict]:
+        """Returns every message produced since the last poll, waiting up to `timeout` for the first."""
+        messages = []
+        try:
+            messages.append(self._messages.get(timeout=timeout))
+            while True:
+                messages.append(self._messages.get_nowait())
+        except queue.Empty:
+            pass
+        return messages
+
+    def cancel(self) -> None:
+        if self._future is not None:
+            self._future.cancel()
+
+
+# ----------------------------
+# BACKGROUND LOOP
+# ----------------------------
+class WorkflowRunner:
+    """
+    A long-lived asyncio event loop on a daemon thread that runs workflows for
+    every Streamlit session in the process.
+
+    Script threads submit() a job and poll it instead of blocking on
+    run_until_complete, so several sessions' workflows run concurrently and the
+    pooled model clients and caches stay bound to one loop for the life of the
+    server. At most `max_concurrent` runs execute at once; the rest wait in line.
+    """
+
+    def __init__(self, max_concurrent: int = 8):
+        self._loop = asyncio.new_event_loop()
+        self._ids = itertools.count(1)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="workflow-loop", daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(max_concurrent), self._loop).result()
+
+    @staticmethod
+    async def _make_semaphore(limit: int) -> asyncio.Semaphore:
+        # Created on the loop so it is bound to it.
+        return asyncio.Semaphore(limit)
+
+    def submit(self, requirements: str, agents: dict) -> WorkflowJob:
+        job = WorkflowJob(next(self._ids))
+        job._future = asyncio.run_coroutine_threadsafe(self._run(job, requirements, dict(agents)), self._loop)
+        # Also covers jobs cancelled before they started running
+        job._future.add_done_callback(lambda _: job._done.set())
+        return job
+
+    async def _run(self, job: WorkflowJob, requirements: str, agents: dict) -> None:
+        try:
+            async with self._semaphore:
+                async for message in run_autogen_workflow(requirements, agents=agents):
+                    job._messages.put(message)
+        except BaseException as e:
+            job.error = e
+            raise
+        finally:
+            job._done.set()
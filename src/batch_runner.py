@@ -0,0 +1,166 @@
+"""
+Headless batch mode: runs the agent team for every requirement in a JSONL or CSV file.
+
+    python batch_runner.py backlog.jsonl --concurrency 16
+    python batch_runner.py --jql "project = MDP"
+    python batch_runner.py --jql "project = MDP" --incremental
+
+Each input row needs a `requirements` (or `requirement` / `text`) field and may
+carry an `id` (or `key`). With --jql the rows are pulled straight from Jira
+(see jira_ingest.py) instead; --incremental re-runs only the issues whose
+requirement text changed since their last successful run (see jira_sync.py). Runs execute concurrently under an asyncio semaphore;
+model calls are additionally throttled by the per-provider `rate_limits` in
+config.json. As each run finishes its result is appended to
+outputs/batch_<timestamp>.jsonl, so partial progress survives an interrupted batch.
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import json
+import time
+from pathlib import Path
+
+from autogen_workflow import run_autogen_workflow
+from jira_ingest import fetch_requirements
+from jira_sync import sync_requirements
+from model_clients import close_model_clients, load_config
+
+
+DEFAULT_AGENTS = {
+    "user_story_writer": True,
+    "test_case_writer": True,
+    "step_definition_writer": True,
+    "test_case_reviewer": False
+}
+
+
+# ----------------------------
+# INPUT
+# ----------------------------
+def read_requirements(path: Path) -> list[dict]:
+    """Reads a JSONL or CSV backlog into a list of {"id", "requirements"} dicts."""
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with path.open(encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    items = []
+    for index, row in enumerate(rows, start=1):
+        text = row.get("requirements") or row.get("requirement") or row.get("text")
+        if not text:
+            raise ValueError(f"{path}: row {index} has no 'requirements' field")
+        items.append({"id": str(row.get("id") or row.get("key") or index), "requirements": text})
+    return items
+
+
+# ----------------------------
+# BATCH EXECUTION
+# ----------------------------
+async def run_one(item: dict, agents: dict) -> dict:
+    started = time.perf_counter()
+    messages = []
+    artifacts = []
+    async for message in run_autogen_workflow(item["requirements"], agents=agents):
+        if message.get("delta"):
+            continue
+        messages.append(message)
+        if "path" in message:
+            artifacts.append(message["path"])
+
+    failed = any(m["source"] == "System" and m["content"].startswith("ERROR:") for m in messages)
+    return {
+        "id": item["id"],
+        "status": "error" if failed else "ok",
+        "duration_seconds": round(time.perf_counter() - started, 3),
+        "artifacts": artifacts,
+        "messages": messages
+    }
+
+
+async def run_batch(items: list[dict], results_path: Path, concurrency: int, agents: dict,
+                    reused: list[dict] = (), on_result=None) -> dict:
+    """
+    Runs every item with at most `concurrency` runs in flight, appending results as they finish.
+    `reused` rows (unchanged since a previous run) are recorded with their cached artifacts
+    without running; `on_result(item, result)` is called for every finished run.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    summary = {"ok": 0, "error": 0, "reused": 0}
+
+    async def guarded(item: dict) -> dict:
+        async with semaphore:
+            try:
+                return await run_one(item, agents)
+            except Exception as e:
+                return {"id": item["id"], "status": "error", "error": str(e), "artifacts": [], "messages": []}
+
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with results_path.open("a", encoding="utf-8") as out:
+        for item in reused:
+            summary["reused"] += 1
+            out.write(json.dumps({"id": item["id"], "status": "reused", "artifacts": item["artifacts"], "messages": []}) + "\n")
+        out.flush()
+
+        async def finish(item: dict) -> tuple[dict, dict]:
+            return item, await guarded(item)
+
+        for finished in asyncio.as_completed([finish(item) for item in items]):
+            item, result = await finished
+            summary[result["status"]] += 1
+            if on_result:
+                on_result(item, result)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            print(f"[{summary['ok'] + summary['error']}/{len(items)}] {result['id']}: {result['status']}")
+    return summary
+
+
+def main() -> None:
+    batch_config = load_config().get("batch", {})
+
+    parser = argparse.ArgumentParser(description="Run the QE agent team over a backlog of requirements.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("input", type=Path, nargs="?", help="JSONL or CSV file of requirements")
+    source.add_argument("--jql", help="Pull the requirements from Jira issues matching this JQL instead")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --jql, skip issues unchanged since their last successful run")
+    parser.add_argument("--concurrency", type=int, default=batch_config.get("concurrency", 8),
+                        help="Maximum number of workflow runs in flight")
+    parser.add_argument("--agents", default=",".join(k for k, v in DEFAULT_AGENTS.items() if v),
+                        help="Comma-separated writers to enable: " + ", ".join(DEFAULT_AGENTS))
+    parser.add_argument("--output", type=Path, default=None, help="Results JSONL (default: outputs/batch_<ts>.jsonl)")
+    args = parser.parse_args()
+    if args.incremental and not args.jql:
+        parser.error("--incremental requires --jql")
+
+    enabled = {name.strip() for name in args.agents.split(",") if name.strip()}
+    agents = {name: name in enabled for name in DEFAULT_AGENTS}
+    ts = datetime.datetime.now().strftime("%m%d%Y_%H%M%S")
+    results_path = args.output or Path.cwd() / "outputs" / f"batch_{ts}.jsonl"
+
+    async def _run() -> dict:
+        try:
+            if args.incremental:
+                sync, cache = await sync_requirements(args.jql)
+                print(f"Jira: {len(sync.changed)} changed, {len(sync.unchanged)} unchanged ({sync.requests})")
+
+                def remember(item: dict, result: dict) -> None:
+                    if result["status"] == "ok" and result["artifacts"]:
+                        cache.record_artifacts(item["id"], item["requirements"], result["artifacts"])
+
+                return await run_batch(sync.changed, results_path, args.concurrency, agents,
+                                       reused=sync.unchanged, on_result=remember)
+            items = await fetch_requirements(args.jql) if args.jql else read_requirements(args.input)
+            return await run_batch(items, results_path, args.concurrency, agents)
+        finally:
+            await close_model_clients()
+
+    summary = asyncio.run(_run())
+    print(f"Done: {summary['ok']} ok, {summary['error']} failed, {summary['reused']} reused. Results in {results_path}")
+
+
+if __name__ == "__main__":
+    main()
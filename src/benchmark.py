@@ -0,0 +1,192 @@
+"""
+Offline throughput benchmark for the agent flows, driven by FakeChatCompletionClient.
+
+    python benchmark.py --iterations 50 --latency 0.2 --jitter 0.05
+
+Benchmarks run_autogen_workflow (Streamlit/batch path) in both team modes, the
+SelectorGroupChat team in QEAgentPoc.py and the RoundRobinGroupChat team in
+SelectGroupChat.py, and reports p50/p95/p99 for end-to-end latency, per-agent turn
+latency (from tracing spans, which are timed by when each agent produced its
+messages, so fan_out branches replayed from buffers are not skewed),
+per-turn overhead spent outside the model, model calls spent on speaker
+selection and peak traced memory. Every iteration runs against a fresh
+config.json whose artifacts, caches, stores (catalogue, step registry,
+near-duplicate index) and traces live in their own temp directory, so no run
+sees another's output and nothing is written under src/.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+import model_clients
+from fake_model_client import FakeChatCompletionClient
+from tracing import Tracer
+
+
+REQUIREMENT = "Users must be able to reset their password from the login page using their registered email."
+TASK = "Create and review test cases based on the requirements provided by the TestManager."
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+# ----------------------------
+# FLOWS
+# ----------------------------
+# A flow yields the source of every message and appends its agent_turn spans to `turns`.
+def _workflow_flow(team_mode: str):
+    async def flow(client: FakeChatCompletionClient, turns: list):
+        from autogen_workflow import run_autogen_workflow
+
+        agents = {"user_story_writer": True, "test_case_writer": True, "step_definition_writer": True}
+        async for message in run_autogen_workflow(REQUIREMENT, agents=agents, model_client=client, team_mode=team_mode):
+            if not message.get("delta"):
+                yield message["source"]
+        # run_autogen_workflow's tracer appends its spans to the (per-iteration) trace file
+        trace_path = Path(model_clients.load_config()["tracing"]["path"])
+        for line in trace_path.read_text(encoding="utf-8").splitlines():
+            span = json.loads(line)
+            if span["kind"] == "agent_turn":
+                turns.append((span["agent"], span["duration_ms"] / 1000))
+
+    return flow
+
+
+def _poc_flow(module_name: str):
+    # The POC scripts live at the repo root and take requirements from input().
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    module = __import__(module_name)
+
+    async def flow(client: FakeChatCompletionClient, turns: list):
+        team = module.build_team(client, input_func=lambda prompt: REQUIREMENT)
+        tracer = Tracer()
+        async for message in team.run_stream(task=TASK):
+            tracer.observe(message)
+            source = getattr(message, "source", None)
+            if source is not None:
+                yield source
+        turns.extend((span.agent, span.duration_ms / 1000) for span in tracer.spans if span.kind == "agent_turn")
+
+    return flow
+
+
+FLOWS = {
+    "autogen_workflow (round_robin)": lambda: _workflow_flow("round_robin"),
+    "autogen_workflow (fan_out)": lambda: _workflow_flow("fan_out"),
+    "QEAgentPoc (SelectorGroupChat)": lambda: _poc_flow("QEAgentPoc"),
+    "SelectGroupChat (RoundRobinGroupChat)": lambda: _poc_flow("SelectGroupChat"),
+}
+
+
+# ----------------------------
+# ISOLATION
+# ----------------------------
+_SOURCE_CONFIG = model_clients.CONFIG_PATH
+_STORE_PATHS = [("llm_cache", "path"), ("catalogue", "path"), ("dedup", "path"), ("step_registry", "path"),
+                ("jira", "cache_path"), ("tracing", "path")]
+
+
+def isolate(root: Path) -> None:
+    """Points load_config at a copy of config.json whose stores live under `root`, and makes `root` the cwd."""
+    root.mkdir(parents=True)
+    config = json.loads(_SOURCE_CONFIG.read_text())
+    for section, key in _STORE_PATHS:
+        config.setdefault(section, {})[key] = str(root / Path(config[section].get(key, f"{section}.db")).name)
+    # ./docs is only read, so its index is built once and shared by the iterations
+    config.setdefault("retrieval", {})["index_path"] = str(root.parent / "docs_index.json")
+    config["tracing"]["prometheus_port"] = None
+    (root / "config.json").write_text(json.dumps(config), encoding="utf-8")
+    model_clients.CONFIG_PATH = root / "config.json"
+    os.chdir(root)
+
+
+# ----------------------------
+# MEASUREMENT
+# ----------------------------
+async def measure(flow, iterations: int, latency: float, jitter: float, warmup: int = 1, workdir: Path | None = None) -> dict:
+    workdir = workdir or Path(tempfile.mkdtemp(prefix="qe_bench_"))
+    # Warm-up runs absorb import and first-call costs and are not recorded.
+    for i in range(warmup):
+        isolate(workdir / f"warmup_{i}")
+        async for _ in flow(FakeChatCompletionClient(latency_seconds=0, seed=-1 - i), []):
+            pass
+
+    samples = defaultdict(list)
+    for i in range(iterations):
+        isolate(workdir / f"run_{i}")
+        client = FakeChatCompletionClient(latency_seconds=latency, jitter_seconds=jitter, seed=i)
+        tracemalloc.start()
+        started = time.perf_counter()
+        turns, agent_turns = 0, []
+        async for _ in flow(client, agent_turns):
+            turns += 1
+        elapsed = time.perf_counter() - started
+        for agent, duration in agent_turns:
+            samples[f"turn:{agent}"].append(duration)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        model_time = sum(call.duration for call in client.calls)
+        samples["end_to_end"].append(elapsed)
+        samples["overhead_per_turn"].append((elapsed - model_time) / max(turns, 1))
+        samples["peak_memory_mb"].append(peak / (1024 * 1024))
+        samples["selector_calls"].append(sum(1 for call in client.calls if call.agent == "selector"))
+    return samples
+
+
+def report(name: str, samples: dict) -> None:
+    print(f"\n== {name} ==")
+    print(f"{'metric':<40}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for metric in sorted(samples, key=lambda m: (m.startswith("turn:"), m)):
+        values = samples[metric]
+        unitless = metric in ("peak_memory_mb", "selector_calls")
+        unit = "" if unitless else " ms"
+        scale = 1 if unitless else 1000
+        row = "".join(f"{percentile(values, p) * scale:>10.2f}" for p in (50, 95, 99))
+        print(f"{metric + unit:<40}{row}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the agent flows against a fake model client.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated model latency per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on the latency (seconds)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unrecorded warm-up runs per flow")
+    parser.add_argument("--flow", choices=list(FLOWS), action="append", help="Flow(s) to run (default: all)")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="qe_bench_"))
+    print(f"Writing artifacts and stores to {workdir}")
+    skipped = []
+    for index, name in enumerate(args.flow or FLOWS):
+        try:
+            flow = FLOWS[name]()
+        except ImportError as e:
+            # e.g. SelectGroupChat.py imports behave at module level
+            print(f"\n== {name} ==\nNOT MEASURED: {e}", file=sys.stderr)
+            skipped.append(f"{name}: {e}")
+            continue
+        report(name, await measure(flow, args.iterations, args.latency, args.jitter, args.warmup, workdir / f"flow_{index}"))
+
+    if skipped:
+        print(f"\nWARNING: {len(skipped)} flow(s) could not be imported and were NOT measured:", file=sys.stderr)
+        for line in skipped:
+            print(f"  - {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+import json
+import re
+from typing import List
+
+from autogen_core import FunctionCall
+from autogen_core.model_context import (
+    BufferedChatCompletionContext,
+    ChatCompletionContext,
+    TokenLimitedChatCompletionContext,
+    UnboundedChatCompletionContext,
+)
+from autogen_core.models import (
+    AssistantMessage,
+    ChatCompletionClient,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+
+# ----------------------------
+# ARTIFACT DIGESTS
+# ----------------------------
+def digest(text: str, max_chars: int = 300) -> str:
+    """
+    Replaces a long artifact with a short description of it.
+    Gherkin keeps its Feature and Scenario titles, CSV keeps its header and row
+    count, code keeps its first line and length; anything else is truncated.
+    """
+    if len(text) <= max_chars:
+        return text
+
+    lines = [line for line in text.strip().splitlines() if line.strip()]
+    first = lines[0].strip() if lines else ""
+
+    if first.startswith("Feature:"):
+        titles = [line.strip() for line in lines if re.match(r"\s*(Feature|Scenario( Outline)?):", line)]
+        return "[Gherkin digest]\n" + "\n".join(titles)[:max_chars]
+    if len(lines) > 2 and first.count(",") >= 2:
+        return f"[CSV artifact digest: {len(lines) - 1} rows; columns: {first[:max_chars]}]"
+    if re.search(r"^\s*(import |from |package |public class |class |def |@Given|@given)", text, re.MULTILINE):
+        return f"[Code artifact digest: {len(lines)} lines; starts with: {first[:120]}]"
+    return text[:max_chars] + " …[truncated]"
+
+
+class SystemDedupeMixin:
+    """
+    Drops an earlier SystemMessage when the same text is added again, so notes
+    re-injected every turn are stored once, at their latest position.
+    """
+
+    async def add_message(self, message: LLMMessage) -> None:
+        if isinstance(message, SystemMessage):
+            self._messages = [m for m in self._messages if not (isinstance(m, SystemMessage) and m.content == message.content)]
+        await super().add_message(message)
+
+
+class BudgetChatCompletionContext(SystemDedupeMixin, TokenLimitedChatCompletionContext):
+    """The most recent messages that fit in the token limit; SystemMessages count against it too."""
+
+
+class DigestChatCompletionContext(SystemDedupeMixin, ChatCompletionContext):
+    """
+    Keeps the last `keep_last` messages verbatim and swaps the text of older
+    ones for short digests (see digest()). Tool-call arguments are digested as
+    well, since write_file calls carry the whole CSV/Java artifact, and so are
+    older SystemMessages (injected guidance). The stored history is otherwise untouched,
+    so the policy can be changed without losing messages.
+    """
+
+    def __init__(self, keep_last: int = 4, digest_chars: int = 300, initial_messages: List[LLMMessage] | None = None):
+        super().__init__(initial_messages)
+        self._keep_last = keep_last
+        self._digest_chars = digest_chars
+
+    def _digest_message(self, message: LLMMessage) -> LLMMessage:
+        if isinstance(message, UserMessage) and message.source == "user":
+            # The original requirements stay verbatim; every later turn depends on them.
+            return message
+        if isinstance(message, SystemMessage):
+            return message.model_copy(update={"content": digest(message.content, self._digest_chars)})
+        if isinstance(message, (UserMessage, AssistantMessage)) and isinstance(message.content, str):
+            return message.model_copy(update={"content": digest(message.content, self._digest_chars)})
+        if isinstance(message, AssistantMessage) and isinstance(message.content, list):
+            calls = [
+                FunctionCall(id=call.id, name=call.name, arguments=json.dumps({"digest": digest(call.arguments, self._digest_chars)}))
+                if len(call.arguments) > self._digest_chars else call
+                for call in message.content
+            ]
+            return message.model_copy(update={"content": calls})
+        return message
+
+    async def get_messages(self) -> List[LLMMessage]:
+        split = max(0, len(self._messages) - self._keep_last)
+        recent = self._messages[split:]
+        # Never start the verbatim window on an orphaned tool result.
+        while recent and isinstance(recent[0], FunctionExecutionResultMessage) and split > 0:
+            split -= 1
+            recent = self._messages[split:]
+        return [self._digest_message(m) for m in self._messages[:split]] + list(recent)
+
+
+# ----------------------------
+# CONTEXT NOTES
+# ----------------------------
+async def replace_note(model_context: ChatCompletionContext, marker: str, content: str | None = None) -> None:
+    """
+    Drops the SystemMessages starting with `marker` that earlier turns added to
+    `model_context`, then adds `content` (which should start with `marker`) if given.
+    Memories inject a fresh note every turn, so only the latest one is kept.
+    """
+    state = await model_context.save_state()
+    kept = [m for m in state["messages"] if not (m.get("type") == "SystemMessage" and m["content"].startswith(marker))]
+    if len(kept) != len(state["messages"]):
+        await model_context.load_state({**state, "messages": kept})
+    if content is not None:
+        await model_context.add_message(SystemMessage(content=content))
+
+
+# ----------------------------
+# POLICY SELECTION
+# ----------------------------
+def build_model_context(agent_name: str, config: dict, model_client: ChatCompletionClient) -> ChatCompletionContext:
+    """
+    Builds the model context for `agent_name` from `context_policy` in config.json.
+
+    Each agent entry (falling back to "default") picks a type:
+      - "unbounded": the full transcript (autogen's default)
+      - "window": the last `size` messages
+      - "token_budget": the most recent messages that fit in `max_tokens`
+      - "summarise": the last `keep_last` messages verbatim, older artifacts as digests
+    """
+    policies = config.get("context_policy", {})
+    policy = policies.get(agent_name, policies.get("default", {"type": "unbounded"}))
+    kind = policy.get("type", "unbounded")
+
+    if kind == "window":
+        return BufferedChatCompletionContext(buffer_size=policy.get("size", 5))
+    if kind == "token_budget":
+        return BudgetChatCompletionContext(model_client, token_limit=policy.get("max_tokens", 4000))
+    if kind == "summarise":
+        return DigestChatCompletionContext(keep_last=policy.get("keep_last", 4), digest_chars=policy.get("digest_chars", 300))
+    if kind == "unbounded":
+        return UnboundedChatCompletionContext()
+    raise ValueError(f"Unknown context policy '{kind}' for agent {agent_name}")
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import math
+import re
+import threading
+import warnings
+from collections import Counter
+from pathlib import Path
+from typing import Sequence
+
+from autogen_core import CancellationToken
+from autogen_core.memory import Memory, MemoryContent, MemoryMimeType, MemoryQueryResult, UpdateContextResult
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import SystemMessage
+
+from context_policy import replace_note
+
+
+_GUIDANCE = "Relevant guidance from ./docs:"
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+# ----------------------------
+# CHUNKING
+# ----------------------------
+def _chunk_text(text: str, chunk_chars: int) -> list[str]:
+    """Packs blank-line separated paragraphs into chunks of roughly `chunk_chars`."""
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _chunk_xlsx(path: Path, chunk_chars: int) -> list[str]:
+    """One chunk per spreadsheet row, rendered as 'header: value' lines."""
+    try:
+        import openpyxl
+    except ImportError:
+        warnings.warn(f"openpyxl is not installed; skipping {path.name}")
+        return []
+
+    chunks = []
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    for sheet in workbook.worksheets:
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        for row in rows:
+            lines = [f"{h}: {str(v).strip()}" for h, v in zip(header, row) if v not in (None, "")]
+            if lines:
+                chunks.append("\n".join(lines)[:chunk_chars * 2])
+    workbook.close()
+    return chunks
+
+
+def chunk_file(path: Path, chunk_chars: int) -> list[str]:
+    if path.suffix.lower() == ".xlsx":
+        return _chunk_xlsx(path, chunk_chars)
+    if path.suffix.lower() in (".txt", ".md", ".csv"):
+        return _chunk_text(path.read_text(encoding="utf-8", errors="replace"), chunk_chars)
+    return []
+
+
+# ----------------------------
+# BM25 INDEX
+# ----------------------------
+class DocIndex:
+    """
+    Persisted BM25 index over the files in a docs folder.
+
+    The index file stores each source file's mtime, size and content hash with
+    its chunks and term frequencies. refresh() re-chunks only files whose content
+    changed (and drops deleted ones), then rebuilds the document-frequency table,
+    which is cheap compared with re-reading every document.
+    """
+
+    def __init__(self, docs_path: Path, index_path: Path, chunk_chars: int = 800, k1: float = 1.5, b: float = 0.75):
+        self.docs_path = docs_path
+        self.index_path = index_path
+        self.chunk_chars = chunk_chars
+        self.k1 = k1
+        self.b = b
+        self._files: dict[str, dict] = {}
+        self._chunks: list[tuple[str, str, Counter]] = []
+        self._df: Counter = Counter()
+        self._avg_len = 0.0
+        self._lock = threading.Lock()
+        if index_path.exists():
+            data = json.loads(index_path.read_text(encoding="utf-8"))
+            if data.get("chunk_chars") == chunk_chars:
+                self._files = data["files"]
+
+    def refresh(self) -> bool:
+        """Re-indexes new or changed files. Returns True if anything changed."""
+        # Pooled teams on different event loops may refresh the shared index at the same time
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        changed = False
+        seen = set()
+        for path in sorted(p for p in self.docs_path.rglob("*") if p.is_file()):
+            name = str(path.relative_to(self.docs_path))
+            seen.add(name)
+            stat = path.stat()
+            entry = self._files.get(name, {})
+            if entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size:
+                continue
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            if entry.get("sha256") == digest:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                continue
+            chunks = chunk_file(path, self.chunk_chars)
+            self._files[name] = {
+                "sha256": digest,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "chunks": chunks,
+                "tf": [dict(Counter(tokenize(c))) for c in chunks]
+            }
+            changed = True
+
+        for name in set(self._files) - seen:
+            del self._files[name]
+            changed = True
+
+        if changed:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self.index_path.write_text(json.dumps({"chunk_chars": self.chunk_chars, "files": self._files}), encoding="utf-8")
+        if changed or not self._chunks:
+            self._build_stats()
+        return changed
+
+    def _build_stats(self) -> None:
+        self._chunks = [
+            (name, chunk, Counter(tf))
+            for name, entry in sorted(self._files.items())
+            for chunk, tf in zip(entry["chunks"], entry["tf"])
+        ]
+        self._df = Counter(term for _, _, tf in self._chunks for term in tf)
+        self._avg_len = sum(sum(tf.values()) for _, _, tf in self._chunks) / max(len(self._chunks), 1)
+
+    def search(self, query: str, top_k: int = 3, extra: Sequence[tuple[str, str, Counter]] = ()) -> list[tuple[float, str, str]]:
+        """
+        Returns up to `top_k` (score, file name, chunk) tuples, best first.
+        `extra` chunks (name, chunk, term counts) are scored alongside the files.
+        """
+        terms = set(tokenize(query))
+        n = len(self._chunks)
+        scored = []
+        for name, chunk, tf in [*self._chunks, *extra]:
+            length = sum(tf.values())
+            score = 0.0
+            for term in terms & tf.keys():
+                idf = math.log(1 + (n - self._df[term] + 0.5) / (self._df[term] + 0.5))
+                freq = tf[term]
+                score += idf * freq * (self.k1 + 1) / (freq + self.k1 * (1 - self.b + self.b * length / (self._avg_len or length)))
+            if score > 0:
+                scored.append((score, name, chunk))
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return scored[:top_k]
+
+
+# ----------------------------
+# AGENT MEMORY
+# ----------------------------
+class DocsMemory(Memory):
+    """
+    Injects the top-k ./docs chunks relevant to the latest message into an
+    agent's model context, instead of pasting whole documents into prompts.
+    Content passed to add() is searched with the docs but kept in memory
+    only, for this DocsMemory, until clear().
+    """
+
+    def __init__(self, index: DocIndex, top_k: int = 3):
+        self._index = index
+        self._top_k = top_k
+        self._added: list[tuple[str, str, Counter]] = []
+
+    def refresh(self) -> bool:
+        """Re-indexes docs files changed since the last refresh."""
+        return self._index.refresh()
+
+    async def update_context(self, model_context: ChatCompletionContext) -> UpdateContextResult:
+        # The previous turn's guidance is replaced, not stacked, and must not feed the next query.
+        await replace_note(model_context, _GUIDANCE)
+        messages = await model_context.get_messages()
+        query = " ".join(m.content for m in messages[-3:] if isinstance(m.content, str))
+        result = await self.query(query)
+        if result.results:
+            guidance = "\n\n".join(f"[{m.metadata['source']}]\n{m.content}" for m in result.results)
+            await model_context.add_message(SystemMessage(content=f"{_GUIDANCE}\n\n{guidance}"))
+        return UpdateContextResult(memories=result)
+
+    async def query(self, query: str | MemoryContent, cancellation_token: CancellationToken | None = None, **kwargs) -> MemoryQueryResult:
+        text = query if isinstance(query, str) else str(query.content)
+        return MemoryQueryResult(results=[
+            MemoryContent(content=chunk, mime_type=MemoryMimeType.TEXT, metadata={"source": name, "score": score})
+            for score, name, chunk in self._index.search(text, self._top_k, self._added)
+        ])
+
+    async def add(self, content: MemoryContent, cancellation_token: CancellationToken | None = None) -> None:
+        text = str(content.content)
+        name = (content.metadata or {}).get("source", "memory")
+        self._added.append((name, text, Counter(tokenize(text))))
+
+    async def clear(self) -> None:
+        self._added = []
+
+    async def close(self) -> None:
+        pass
+
+
+_indexes: dict[tuple, DocIndex] = {}
+
+
+def get_docs_memory(config: dict) -> DocsMemory | None:
+    """Returns a DocsMemory over the configured docs folder, refreshing its index if files changed."""
+    retrieval = config.get("retrieval", {})
+    if not retrieval.get("enabled", True):
+        return None
+
+    base = Path(__file__).parent
+    docs_path = (base / retrieval.get("docs_path", "../docs")).resolve()
+    index_path = base / retrieval.get("index_path", ".cache/docs_index.json")
+    chunk_chars = retrieval.get("chunk_chars", 800)
+    key = (docs_path, index_path, chunk_chars)
+    if key not in _indexes:
+        _indexes[key] = DocIndex(docs_path, index_path, chunk_chars)
+    index = _indexes[key]
+    index.refresh()
+    return DocsMemory(index, retrieval.get("top_k", 3))
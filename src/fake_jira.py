@@ -0,0 +1,145 @@
+"""
+In-process mock of the Jira REST endpoints JiraClient uses.
+
+    python fake_jira.py                 # ingest 250 mock issues via /search/jql
+    python fake_jira.py --legacy        # same, against a server without /search/jql
+    python fake_jira.py --failure-rate 0.2 --latency 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+
+import httpx
+
+from jira_ingest import fetch_requirements
+
+
+def make_issue(key: str, summary: str, description: str = "", updated: str = "2025-01-01T00:00:00.000+0000") -> dict:
+    """A minimal Jira REST v3 issue with an ADF description."""
+    return {
+        "key": key,
+        "fields": {
+            "summary": summary,
+            "updated": updated,
+            "description": {
+                "type": "doc",
+                "version": 1,
+                "content": [{"type": "paragraph", "content": [{"type": "text", "text": description}]}],
+            },
+        },
+    }
+
+
+# ----------------------------
+# MOCK JIRA SERVER
+# ----------------------------
+class FakeJira:
+    """
+    In-process stand-in for the Jira REST v3 endpoints JiraClient uses, served
+    through httpx.MockTransport so no network or server process is needed.
+
+    Supports GET /rest/api/3/issue/{key} (with ETag / If-None-Match),
+    /rest/api/3/search/jql with nextPageToken paging and the legacy
+    /rest/api/3/search with startAt/total paging (`project = X` JQL only).
+    `legacy_search` answers /search/jql with 404, like an older server.
+    Edit `issues` between calls to simulate changes. `failure_rate` answers a
+    share of requests with 429/503 to exercise retries, and `latency_seconds`
+    delays every response so concurrency limits can be observed via
+    `max_in_flight`.
+    """
+
+    def __init__(self, issues: list[dict], max_page_size: int = 50, latency_seconds: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = 0, legacy_search: bool = False):
+        self.issues = {issue["key"]: issue for issue in issues}
+        self.max_page_size = max_page_size
+        self.legacy_search = legacy_search
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self.transport = httpx.MockTransport(self._handle)
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency_seconds:
+                await asyncio.sleep(self.latency_seconds)
+            if self._random.random() < self.failure_rate:
+                self.failures += 1
+                return httpx.Response(self._random.choice([429, 503]), headers={"Retry-After": "0"})
+            return self._route(request)
+        finally:
+            self.in_flight -= 1
+
+    def _route(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if match := re.fullmatch(r"/rest/api/3/issue/([A-Z][A-Z0-9]*-\d+)", path):
+            issue = self.issues.get(match.group(1))
+            if issue is None:
+                return httpx.Response(404, json={"errorMessages": ["Issue does not exist"]})
+            etag = '"' + hashlib.sha1(json.dumps(issue, sort_keys=True).encode()).hexdigest()[:16] + '"'
+            if request.headers.get("If-None-Match") == etag:
+                return httpx.Response(304, headers={"ETag": etag})
+            return httpx.Response(200, json=issue, headers={"ETag": etag})
+
+        if path in ("/rest/api/3/search/jql", "/rest/api/3/search"):
+            legacy = path == "/rest/api/3/search"
+            if self.legacy_search and not legacy:
+                return httpx.Response(404, json={"errorMessages": [f"No route for {path}"]})
+            jql = request.url.params.get("jql", "")
+            project = re.search(r"project\s*=\s*\"?(\w+)", jql, re.IGNORECASE)
+            keys = sorted((k for k in self.issues if not project or k.startswith(project.group(1) + "-")),
+                          key=lambda k: int(k.rsplit("-", 1)[1]))
+            start = int(request.url.params.get("startAt" if legacy else "nextPageToken", 0))
+            size = min(int(request.url.params.get("maxResults", 50)), self.max_page_size)
+            page = keys[start:start + size]
+            body = {"issues": [self.issues[k] for k in page]}
+            if legacy:
+                body.update(startAt=start, maxResults=size, total=len(keys))
+            else:
+                body["isLast"] = start + size >= len(keys)
+                if not body["isLast"]:
+                    body["nextPageToken"] = str(start + size)
+            return httpx.Response(200, content=json.dumps(body), headers={"Content-Type": "application/json"})
+
+        return httpx.Response(404, json={"errorMessages": [f"No route for {path}"]})
+
+
+async def _ingest(jira: FakeJira, args: argparse.Namespace) -> list[dict]:
+    config = {"jira": {"server": "https://jira.invalid", "page_size": args.page_size,
+                       "max_concurrency": args.concurrency, "backoff_seconds": 0}}
+    return await fetch_requirements("project = MDP ORDER BY key", config, transport=jira.transport)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest mock Jira issues through JiraClient.")
+    parser.add_argument("--issues", type=int, default=250)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--legacy", action="store_true", help="serve startAt/total paging only")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    issues = [make_issue(f"MDP-{i}", f"Story {i}", f"As a user I want feature {i}") for i in range(1, args.issues + 1)]
+    jira = FakeJira(issues, latency_seconds=args.latency, failure_rate=args.failure_rate, legacy_search=args.legacy)
+    start = time.perf_counter()
+    rows = asyncio.run(_ingest(jira, args))
+    elapsed = time.perf_counter() - start
+    print(f"Ingested {len(rows)}/{args.issues} issues in {elapsed * 1000:.1f} ms: "
+          f"{jira.requests} requests, {jira.failures} retried failures, max {jira.max_in_flight} in flight")
+    if [row["id"] for row in rows] != [issue["key"] for issue in issues]:
+        raise SystemExit("Mismatch: the ingested issues differ from the mock's")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import AsyncGenerator, Mapping, Sequence
+
+from autogen_core import FunctionCall
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    ModelFamily,
+    ModelInfo,
+    RequestUsage,
+    SystemMessage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+
+# ----------------------------
+# CANNED RESPONSES
+# ----------------------------
+SAMPLE_GHERKIN = """Feature: Password reset
+  As a registered user
+  I want to reset my password
+  So that I can regain access to my account
+
+  Scenario: Reset password with a registered email
+    Given the user is on the login page
+    When the user requests a password reset for "user@example.com"
+    Then a reset link is sent to "user@example.com"
+
+  Scenario: Reset password with an unknown email
+    Given the user is on the login page
+    When the user requests a password reset for "nobody@example.com"
+    Then an error message "Email not found" is shown
+"""
+
+SAMPLE_CSV = """Test Case ID,Test Case Name,Preconditions,Test Steps,Expected Result
+TC_001,Reset with registered email,User account exists,"1. Open login page 2. Click Forgot password 3. Enter registered email 4. Submit",Reset link is emailed to the user
+TC_002,Reset with unknown email,None,"1. Open login page 2. Click Forgot password 3. Enter unknown email 4. Submit",Error 'Email not found' is shown
+"""
+
+SAMPLE_TEST_CASES = [
+    {
+        "id": "TC_001",
+        "name": "Reset with registered email",
+        "requirement": "Scenario: Reset password with a registered email",
+        "preconditions": "User account exists",
+        "steps": ["Open login page", "Click Forgot password", "Enter registered email", "Submit"],
+        "expected_result": "Reset link is emailed to the user",
+    },
+    {
+        "id": "TC_002",
+        "name": "Reset with unknown email",
+        "requirement": "Scenario: Reset password with an unknown email",
+        "preconditions": "None",
+        "steps": ["Open login page", "Click Forgot password", "Enter unknown email", "Submit"],
+        "expected_result": "Error 'Email not found' is shown",
+    },
+]
+
+SAMPLE_PYTHON_STEPS = """from behave import given, when, then
+
+
+@given('the user is on the login page')
+def step_impl(context):
+    pass
+"""
+
+SAMPLE_JAVA = """import io.cucumber.java.en.*;
+
+public class StepDefinition {
+    @Given("the user is on the login page")
+    public void theUserIsOnTheLoginPage() {
+    }
+}
+"""
+
+
+def _call(name: str, **arguments) -> list[FunctionCall]:
+    return [FunctionCall(id=f"call_{uuid.uuid4().hex[:8]}", name=name, arguments=json.dumps(arguments))]
+
+
+# (pattern searched in the agent's system message, response). First match wins.
+DEFAULT_SCRIPT: list[tuple[str, str | list[FunctionCall]]] = [
+    (r"Java", _call("write_java_file", filename="StepDefinition.java", content=SAMPLE_JAVA)),
+    (r"behave", _call("write_file", content=SAMPLE_PYTHON_STEPS, type="step_definition")),
+    (r"review", "APPROVED"),
+    (r"write_test_cases", _call("write_test_cases", test_cases=SAMPLE_TEST_CASES)),
+    (r"test cases? (in|writer)|CSV", _call("write_file", content=SAMPLE_CSV, type="test_case")),
+    (r"Test Manager|Gherkin", SAMPLE_GHERKIN),
+]
+
+
+@dataclass
+class FakeCall:
+    agent: str
+    started: float
+    duration: float
+    prompt_tokens: int
+    completion_tokens: int
+
+
+# ----------------------------
+# FAKE MODEL CLIENT
+# ----------------------------
+class FakeChatCompletionClient(ChatCompletionClient):
+    """
+    Offline stand-in for OpenAI/Ollama clients, used for benchmarks and regression runs.
+
+    The response is chosen by matching the calling agent's system message against
+    `script`, so one client can serve a whole team. Tool calls are returned as
+    FunctionCall lists exactly like a real provider would. After a tool result the
+    client answers with a short acknowledgement, and SelectorGroupChat speaker
+    prompts are answered by rotating through the listed participants.
+    Every call sleeps for `latency_seconds` (+/- `jitter_seconds`) and is recorded
+    in `calls` so harnesses can separate model time from framework overhead.
+    """
+
+    def __init__(
+        self,
+        script: list[tuple[str, str | list[FunctionCall]]] | None = None,
+        latency_seconds: float = 0.05,
+        jitter_seconds: float = 0.0,
+        completion_tokens: int | None = None,
+        chunk_size: int = 16,
+        seed: int = 0,
+    ):
+        self._script = [(re.compile(p, re.IGNORECASE), r) for p, r in (script or DEFAULT_SCRIPT)]
+        self._latency = latency_seconds
+        self._jitter = jitter_seconds
+        self._completion_tokens = completion_tokens
+        self._chunk_size = chunk_size
+        self._random = random.Random(seed)
+        self._selector_turn = 0
+        self._last_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self.calls: list[FakeCall] = []
+        self._model_info = ModelInfo(
+            vision=False,
+            function_calling=True,
+            json_output=True,
+            structured_output=False,
+            family=ModelFamily.UNKNOWN,
+        )
+
+    def _respond(self, messages: Sequence[LLMMessage], tools: Sequence[Tool | ToolSchema]) -> tuple[str, str | list[FunctionCall]]:
+        first = messages[0].content if messages and isinstance(messages[0].content, str) else ""
+
+        if "select the next role" in first:
+            participants = re.findall(r"'([^']+)'", first.split("select the next role from", 1)[-1].split("\n")[0])
+            choice = participants[self._selector_turn % len(participants)] if participants else ""
+            self._selector_turn += 1
+            return "selector", choice
+
+        system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+        agent = next((p.pattern for p, _ in self._script if p.search(system)), "unknown")
+
+        if messages and isinstance(messages[-1], FunctionExecutionResultMessage):
+            return agent, "Done."
+        for pattern, response in self._script:
+            if pattern.search(system):
+                return agent, self._fit_to_tools(response, tools)
+        return agent, "OK"
+
+    @staticmethod
+    def _fit_to_tools(response: str | list[FunctionCall], tools: Sequence[Tool | ToolSchema]) -> str | list[FunctionCall]:
+        # Agents without the scripted tool get the artifact as plain text instead.
+        if isinstance(response, str):
+            return response
+        names = {t.name if isinstance(t, Tool) else t["name"] for t in tools}
+        if all(call.name in names for call in response):
+            return [FunctionCall(id=f"call_{uuid.uuid4().hex[:8]}", name=c.name, arguments=c.arguments) for c in response]
+        return "\n".join(json.loads(call.arguments).get("content", "") for call in response)
+
+    def _usage(self, messages: Sequence[LLMMessage], content: str | list[FunctionCall]) -> RequestUsage:
+        text = content if isinstance(content, str) else "".join(c.arguments for c in content)
+        completion = self._completion_tokens if self._completion_tokens is not None else max(1, len(text) // 4)
+        return RequestUsage(prompt_tokens=self.count_tokens(messages), completion_tokens=completion)
+
+    def _record(self, agent: str, started: float, usage: RequestUsage) -> None:
+        self.calls.append(FakeCall(agent, started, time.perf_counter() - started, usage.prompt_tokens, usage.completion_tokens))
+        self._last_usage = usage
+        self._total_usage = RequestUsage(
+            prompt_tokens=self._total_usage.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._total_usage.completion_tokens + usage.completion_tokens,
+        )
+
+    def _delay(self) -> float:
+        return max(0.0, self._latency + self._random.uniform(-self._jitter, self._jitter))
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice="auto",
+        json_output=None,
+        extra_create_args: Mapping = {},
+        cancellation_token=None,
+    ) -> CreateResult:
+        started = time.perf_counter()
+        agent, content = self._respond(messages, tools)
+        await asyncio.sleep(self._delay())
+        usage = self._usage(messages, content)
+        self._record(agent, started, usage)
+        return CreateResult(
+            finish_reason="function_calls" if isinstance(content, list) else "stop",
+            content=content,
+            usage=usage,
+            cached=False,
+        )
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice="auto",
+        json_output=None,
+        extra_create_args: Mapping = {},
+        cancellation_token=None,
+    ) -> AsyncGenerator[str | CreateResult, None]:
+        started = time.perf_counter()
+        agent, content = self._respond(messages, tools)
+        if isinstance(content, str):
+            chunks = [content[i:i + self._chunk_size] for i in range(0, len(content), self._chunk_size)] or [""]
+            for chunk in chunks:
+                await asyncio.sleep(self._delay() / len(chunks))
+                yield chunk
+        else:
+            await asyncio.sleep(self._delay())
+        usage = self._usage(messages, content)
+        self._record(agent, started, usage)
+        yield CreateResult(
+            finish_reason="function_calls" if isinstance(content, list) else "stop",
+            content=content,
+            usage=usage,
+            cached=False,
+        )
+
+    async def close(self) -> None:
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._last_usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._total_usage
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return sum(len(str(m.content)) for m in messages) // 4
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return max(0, 128000 - self.count_tokens(messages, tools=tools))
+
+    @property
+    def capabilities(self):
+        return self._model_info
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._model_info
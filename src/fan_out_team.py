@@ -0,0 +1,114 @@
+import asyncio
+import time
+from typing import AsyncGenerator, Sequence
+
+from autogen_agentchat.base import ChatAgent, TaskResult, Team, TerminationCondition
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, ModelClientStreamingChunkEvent, TextMessage
+from autogen_core import CancellationToken
+
+
+_DONE = object()
+
+
+class FanOutTeam:
+    """
+    A two-level DAG: `head` answers the task first, then every agent in
+    `branches` runs concurrently on the task plus the head's final message.
+
+    A branch may itself be a team (e.g. a writer and its reviewer taking turns).
+    Branches do not see each other's output. Their messages are merged back in
+    the order the branches were given: the first branch streams live while the
+    others are buffered and flushed as soon as the branch before them finishes,
+    so the stream is the same on every run however the branches interleave.
+    `termination_condition` is checked after every message; when it fires the
+    branches still running are cancelled. Exposes run_stream()/reset() like the
+    autogen teams it stands in for.
+    """
+
+    def __init__(self, head: ChatAgent, branches: Sequence[ChatAgent | Team], termination_condition: TerminationCondition | None = None):
+        self._head = head
+        self._branches = list(branches)
+        self._termination = termination_condition
+
+    async def _should_stop(self, message: BaseAgentEvent | BaseChatMessage) -> str | None:
+        if self._termination is None or isinstance(message, ModelClientStreamingChunkEvent):
+            return None
+        stop = await self._termination([message])
+        return stop.content if stop else None
+
+    async def run_stream(
+        self, task: str, cancellation_token: CancellationToken | None = None
+    ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | TaskResult, None]:
+        cancellation_token = cancellation_token or CancellationToken()
+        if self._termination is not None:
+            await self._termination.reset()
+        task_message = TextMessage(content=task, source="user")
+        messages: list[BaseAgentEvent | BaseChatMessage] = [task_message]
+        yield task_message
+
+        head_reply = None
+        async for message in self._head.run_stream(task=task_message, cancellation_token=cancellation_token, output_task_messages=False):
+            if isinstance(message, TaskResult):
+                continue
+            if isinstance(message, BaseChatMessage):
+                head_reply = message
+            if not isinstance(message, ModelClientStreamingChunkEvent):
+                messages.append(message)
+            yield message
+            if stop_reason := await self._should_stop(message):
+                yield TaskResult(messages=messages, stop_reason=stop_reason)
+                return
+
+        if head_reply is None:
+            yield TaskResult(messages=messages, stop_reason="Head agent produced no reply")
+            return
+        if not self._branches:
+            yield TaskResult(messages=messages)
+            return
+
+        branch_task = [task_message, head_reply]
+        queues = [asyncio.Queue() for _ in self._branches]
+
+        async def run_branch(agent: ChatAgent | Team, out: asyncio.Queue) -> None:
+            # Buffered messages reach the stream late; the tracer times the turn from this stamp
+            turn_started = time.time()
+            try:
+                async for message in agent.run_stream(task=branch_task, cancellation_token=cancellation_token, output_task_messages=False):
+                    if isinstance(message, TaskResult):
+                        continue
+                    if isinstance(message, BaseChatMessage):
+                        message.metadata["turn_started"] = str(turn_started)
+                        turn_started = message.created_at.timestamp()
+                    out.put_nowait(message)
+            except Exception as e:
+                out.put_nowait(e)
+            finally:
+                out.put_nowait(_DONE)
+
+        tasks = [asyncio.create_task(run_branch(agent, out)) for agent, out in zip(self._branches, queues)]
+        try:
+            for out in queues:
+                while (message := await out.get()) is not _DONE:
+                    if isinstance(message, Exception):
+                        raise message
+                    if not isinstance(message, ModelClientStreamingChunkEvent):
+                        messages.append(message)
+                    yield message
+                    if stop_reason := await self._should_stop(message):
+                        yield TaskResult(messages=messages, stop_reason=stop_reason)
+                        return
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        yield TaskResult(messages=messages)
+
+    async def reset(self) -> None:
+        for agent in [self._head, *self._branches]:
+            if isinstance(agent, Team):
+                await agent.reset()
+            else:
+                await agent.on_reset(CancellationToken())
+        if self._termination is not None:
+            await self._termination.reset()
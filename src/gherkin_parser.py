@@ -0,0 +1,150 @@
+"""
+Reads Gherkin features out of model output (TestManager's reply) into plain dataclasses.
+
+Tolerates what models wrap around the feature: prose before and after it,
+``` fences, markdown headings ("## Scenario: ...") and bold keywords
+("**Given** ..."). And/But/* steps take the keyword of the step before them.
+Scenario Outline examples, step data tables, doc strings and tags are kept.
+"""
+import re
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Step:
+    keyword: str  # "Given", "When" or "Then", with And/But/* resolved
+    text: str
+    line: int
+    doc_string: str | None = None
+    table: list[list[str]] | None = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    line: int
+    tags: list[str] = field(default_factory=list)
+    steps: list[Step] = field(default_factory=list)
+    outline: bool = False
+    examples: list[list[list[str]]] = field(default_factory=list)  # per Examples block: header row + rows
+
+
+@dataclass
+class Feature:
+    name: str
+    line: int
+    tags: list[str] = field(default_factory=list)
+    description: str = ""
+    background: list[Step] = field(default_factory=list)
+    scenarios: list[Scenario] = field(default_factory=list)
+
+    def steps(self) -> list[Step]:
+        """Background steps, then every scenario's steps, in document order."""
+        return self.background + [step for scenario in self.scenarios for step in scenario.steps]
+
+
+_SECTION = re.compile(
+    r"^(Feature|Rule|Background|Scenario Outline|Scenario Template|Scenario|Example|Examples|Scenarios)\s*:\s*(.*)$"
+)
+_STEP = re.compile(r"^(Given|When|Then|And|But|\*)\s+(.+)$")
+_MARKDOWN = re.compile(r"^(?:#+\s*|[->]\s+)?(?:\*\*|__)?")
+_BOLD_KEYWORD = re.compile(r"^(\w+(?: \w+)?:?)(?:\*\*|__)\s*")
+
+
+def _clean(line: str) -> str:
+    """Drops markdown decoration in front of a Gherkin keyword."""
+    stripped = _MARKDOWN.sub("", line.strip(), count=1)
+    stripped = _BOLD_KEYWORD.sub(lambda m: m.group(1) + " ", stripped, count=1)
+    if _SECTION.match(stripped) or _STEP.match(stripped):
+        return stripped
+    return line.strip()
+
+
+def _table_row(line: str) -> list[str]:
+    cells = re.split(r"(?<!\\)\|", line.strip().strip("|"))
+    return [cell.strip().replace("\\|", "|") for cell in cells]
+
+
+def parse_gherkin(text: str) -> list[Feature]:
+    """Every feature in `text`; empty when there is no "Feature:" line."""
+    features: list[Feature] = []
+    feature: Feature | None = None
+    scenario: Scenario | None = None
+    steps: list[Step] | None = None  # the background's or scenario's step list
+    examples: list[list[str]] | None = None
+    tags: list[str] = []
+    doc_lines: list[str] | None = None
+    doc_indent = 0
+    in_description = False
+
+    for number, raw in enumerate(text.splitlines(), start=1):
+        if doc_lines is not None:
+            if raw.strip() == '"""':
+                steps[-1].doc_string = "\n".join(doc_lines)
+                doc_lines = None
+            else:
+                doc_lines.append(raw[doc_indent:] if raw[:doc_indent].strip() == "" else raw.strip())
+            continue
+
+        line = _clean(raw)
+        if not line or line.startswith("```"):
+            continue
+        if line.startswith("@"):
+            tags.extend(tag for tag in line.split() if tag.startswith("@"))
+            continue
+        if line.startswith("#"):
+            continue
+
+        section = _SECTION.match(line)
+        if section:
+            keyword, name = section.group(1), section.group(2).strip()
+            in_description = False
+            examples = None
+            if keyword == "Feature":
+                feature = Feature(name, number, tags)
+                features.append(feature)
+                scenario, steps, in_description = None, None, True
+            elif feature is None:
+                pass
+            elif keyword == "Rule":
+                scenario, steps = None, None
+            elif keyword == "Background":
+                scenario, steps = None, feature.background
+            elif keyword in ("Examples", "Scenarios"):
+                if scenario is not None:
+                    examples = []
+                    scenario.examples.append(examples)
+            else:
+                scenario = Scenario(name, number, tags, outline=keyword in ("Scenario Outline", "Scenario Template"))
+                feature.scenarios.append(scenario)
+                steps = scenario.steps
+            tags = []
+            continue
+        if feature is None:
+            continue
+
+        step = _STEP.match(line)
+        if step and steps is not None:
+            keyword = step.group(1)
+            if keyword not in ("Given", "When", "Then"):
+                keyword = steps[-1].keyword if steps else "Given"
+            steps.append(Step(keyword, step.group(2).strip(), number))
+            examples = None
+            in_description = False
+            continue
+
+        if line.startswith("|"):
+            if examples is not None:
+                examples.append(_table_row(line))
+            elif steps:
+                if steps[-1].table is None:
+                    steps[-1].table = []
+                steps[-1].table.append(_table_row(line))
+            continue
+        if line == '"""' and steps:
+            doc_lines, doc_indent = [], len(raw) - len(raw.lstrip())
+            continue
+        # any other text is prose around the feature, except directly under "Feature:"
+        if in_description:
+            feature.description = f"{feature.description}\n{line}".strip()
+    return features
@@ -0,0 +1,213 @@
+"""
+Mechanical checks from docs/ISTQB Test case guidelines.txt, run locally before the LLM reviewer.
+
+    python istqb_rules.py ../outputs/Test_Cases.csv     # one line per failing case
+
+Every rule is a vectorised pandas expression over the whole suite (one column
+per field), so screening a few thousand cases takes milliseconds. The rules
+cover what needs no judgement: a unique ID, a title, preconditions, at most
+`max_steps` steps, an expected result, and no vague expected results ("it
+should work", "as expected"). Whether the cases are any good is still the
+reviewer's call. PrescreenedReviewer only lets it see suites that pass.
+"""
+import argparse
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncGenerator, Sequence
+
+import numpy as np
+import pandas as pd
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, TextMessage
+from autogen_core import CancellationToken
+
+from model_clients import load_config
+from test_catalogue import read_test_case_csv
+
+
+# Non-capturing groups only: the patterns are OR-ed into one pandas str.contains
+VAGUE_EXPECTED = [
+    r"\b(?:should|must|will|to)\s+work\b",
+    r"\bworks?\s+(?:fine|correctly|properly|well|ok|as\s+expected)\b",
+    r"\bas\s+expected\b",
+    r"\bexpected\s+(?:behaviou?r|result|outcome)\b",
+    r"\bshould\s+be\s+(?:fine|ok|okay|correct|good)\b",
+    r"^\s*(?:ok|okay|pass(?:ed)?|success(?:ful)?|done|no\s+errors?)\s*\.?\s*$",
+]
+_STEP_NUMBER = r"(?:^|\s)\d+[.)]\s"
+_BLANK = r"^\s*(?:-+|tbd)?\s*$"
+_CASE_ID = re.compile(r"^\s*[A-Za-z]{1,6}[-_]?\d+\s*$")
+
+
+@dataclass
+class RuleSettings:
+    max_steps: int = 10
+    min_expected_words: int = 3
+    vague_expected: Sequence[str] = tuple(VAGUE_EXPECTED)
+
+
+def load_rules(config: dict) -> RuleSettings | None:
+    """Settings from `istqb_rules` in config.json, or None when disabled."""
+    rules_config = config.get("istqb_rules", {})
+    if not rules_config.get("enabled", True):
+        return None
+    return RuleSettings(
+        max_steps=rules_config.get("max_steps", 10),
+        min_expected_words=rules_config.get("min_expected_words", 3),
+        vague_expected=tuple(rules_config.get("vague_expected", VAGUE_EXPECTED)),
+    )
+
+
+# ----------------------------
+# RULES
+# ----------------------------
+def _frame(cases: Sequence[dict] | pd.DataFrame) -> pd.DataFrame:
+    """One row per case with case_id, name, preconditions, steps and expected_result as strings."""
+    frame = cases if isinstance(cases, pd.DataFrame) else pd.DataFrame(list(cases))
+    if "id" in frame:
+        # WriteTestCasesTool's schema calls it id
+        frame["case_id"] = frame["case_id"].fillna(frame["id"]) if "case_id" in frame else frame["id"]
+    for column in ("case_id", "name", "preconditions", "steps", "expected_result"):
+        if column not in frame:
+            frame[column] = ""
+    steps = frame["steps"].map(lambda s: "\n".join(f"{i}. {step}" for i, step in enumerate(s, 1)) if isinstance(s, list) else s)
+    frame = frame.assign(steps=steps)
+    return frame[["case_id", "name", "preconditions", "steps", "expected_result"]].fillna("").astype(str)
+
+
+def screen(cases: Sequence[dict] | pd.DataFrame, settings: RuleSettings | None = None) -> pd.DataFrame:
+    """
+    Checks every case at once. Returns one row per case with case_id, passed,
+    steps (the counted number) and reasons (a list of failed rules).
+    """
+    settings = settings or RuleSettings()
+    frame = _frame(cases)
+    ids = frame["case_id"].str.strip()
+    expected = frame["expected_result"].str.strip()
+
+    numbered = frame["steps"].str.count(_STEP_NUMBER)
+    lines = frame["steps"].str.strip().str.count(r"\n") + 1
+    step_count = numbered.where(numbered > 0, lines.where(frame["steps"].str.strip().ne(""), 0))
+    vague = expected.str.contains("|".join(f"(?:{p})" for p in settings.vague_expected), case=False, regex=True)
+    short = expected.str.count(r"\w+") < settings.min_expected_words
+
+    failures = {
+        "missing ID": ids.str.match(_BLANK),
+        "duplicate ID": ids.duplicated(keep=False) & ~ids.str.match(_BLANK),
+        "missing title": frame["name"].str.match(_BLANK),
+        "missing preconditions (write 'None' if there are none)": frame["preconditions"].str.match(_BLANK),
+        "no test steps": step_count.eq(0),
+        f"more than {settings.max_steps} steps": step_count > settings.max_steps,
+        "missing expected result": expected.str.match(_BLANK),
+        "vague expected result": ~expected.str.match(_BLANK) & (vague | short),
+    }
+    failed = pd.DataFrame(failures)
+    result = pd.DataFrame({"case_id": ids, "passed": ~failed.any(axis=1), "steps": step_count})
+    rules = np.array(list(failures), dtype=object)
+    result["reasons"] = [rules[hits].tolist() for hits in failed.to_numpy()]
+    return result
+
+
+def report(result: pd.DataFrame) -> str:
+    """The failures as review feedback, one line per failing case."""
+    lines = []
+    for index, row in result[~result["passed"]].iterrows():
+        reasons = [f"{reason} (has {row['steps']})" if reason.startswith("more than") else reason for reason in row["reasons"]]
+        lines.append(f"- {row['case_id'] or f'row {index + 1}'}: {', '.join(reasons)}")
+    return "\n".join(lines)
+
+
+# ----------------------------
+# REVIEWER GATE
+# ----------------------------
+_CSV_PATH = re.compile(r"""['"]path['"]\s*:\s*['"]([^'"]+\.csv)['"]""")
+
+
+def cases_in(text: str) -> list[dict]:
+    """Test cases in a message: a CSV or markdown table in the text, or the CSV file a write_file result points to."""
+    for path in _CSV_PATH.findall(text):
+        if Path(path).is_file():
+            return read_test_case_csv(Path(path).read_text(encoding="utf-8", errors="replace"))
+    if "|" not in text and "," not in text:
+        return []
+    cases = [case for case in read_test_case_csv(text) if any(case.values())]
+    # Prose with commas also parses as CSV; a real suite has test case IDs
+    return cases if any(_CASE_ID.match(case["case_id"]) for case in cases) else []
+
+
+class PrescreenedReviewer(BaseChatAgent):
+    """
+    Stands in for the reviewer agent. When the latest test cases in the thread
+    fail the rules it replies with SUGGESTIONS listing the failures, without a
+    model call. Otherwise (or when there are no cases to check) the wrapped
+    reviewer takes the turn. It then sees every message since its last turn,
+    except the suites already answered with local feedback.
+    """
+
+    def __init__(self, reviewer: BaseChatAgent, settings: RuleSettings | None = None):
+        super().__init__(reviewer.name, reviewer.description)
+        self._reviewer = reviewer
+        self._settings = settings or RuleSettings()
+        self._unseen: list[BaseChatMessage] = []
+        self.local_reviews = 0
+        self.model_reviews = 0
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return self._reviewer.produced_message_types
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken) -> Response:
+        response = None
+        async for item in self.on_messages_stream(messages, cancellation_token):
+            if isinstance(item, Response):
+                response = item
+        return response
+
+    async def on_messages_stream(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+                                 ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | Response, None]:
+        self._unseen.extend(messages)
+        suite, cases = next(((message, found) for message in reversed(self._unseen) if message.source != self.name
+                             for found in [cases_in(message.to_text())] if found), (None, []))
+        if cases:
+            result = screen(cases, self._settings)
+            if not result["passed"].all():
+                self.local_reviews += 1
+                failed = int((~result["passed"]).sum())
+                reply = TextMessage(source=self.name, content=(
+                    f"SUGGESTIONS\n{failed} of {len(result)} test cases do not follow the test case guidelines:\n"
+                    f"{report(result)}\nFix these and send the complete set of test cases again."
+                ))
+                # the failing suite has been answered; the task and Gherkin around it are still unseen
+                self._unseen = [message for message in self._unseen if message is not suite]
+                yield Response(chat_message=reply)
+                return
+
+        self.model_reviews += 1
+        unseen, self._unseen = self._unseen, []
+        async for item in self._reviewer.on_messages_stream(unseen, cancellation_token):
+            yield item
+
+    async def on_reset(self, cancellation_token: CancellationToken) -> None:
+        self._unseen = []
+        self.local_reviews = self.model_reviews = 0
+        await self._reviewer.on_reset(cancellation_token)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check test cases against the ISTQB test case guidelines.")
+    parser.add_argument("paths", type=Path, nargs="+")
+    args = parser.parse_args()
+
+    settings = load_rules(load_config()) or RuleSettings()
+    for path in args.paths:
+        cases = read_test_case_csv(path.read_text(encoding="utf-8", errors="replace"))
+        result = screen(cases, settings)
+        print(f"{path}: {int(result['passed'].sum())}/{len(result)} pass")
+        if not result["passed"].all():
+            print(report(result))
+
+
+if __name__ == "__main__":
+    main()
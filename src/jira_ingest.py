@@ -0,0 +1,204 @@
+"""
+Pulls user stories from Jira (including Jira Product Discovery projects) for the batch workflow.
+
+    python jira_ingest.py --jql "project = MDP" --output backlog.jsonl
+    python batch_runner.py --jql "project = MDP"
+
+Credentials come from JIRA_SERVER, JIRA_EMAIL and JIRA_API_TOKEN (a .env file
+works). Requests share one pooled httpx client, run under a concurrency limit
+and are retried with exponential backoff on 429/5xx and connection errors.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+from pathlib import Path
+from typing import AsyncIterator, Iterable
+
+import httpx
+from dotenv import load_dotenv
+
+from adf_convert import adf_to_markdown
+from model_clients import load_config
+
+
+ISSUE_FIELDS = ["summary", "description", "updated", "issuetype", "status"]
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+SEARCH_PATH = "/rest/api/3/search/jql"
+LEGACY_SEARCH_PATH = "/rest/api/3/search"
+
+
+class JiraError(Exception):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ----------------------------
+# ISSUES
+# ----------------------------
+def issue_to_requirement(issue: dict) -> dict:
+    """Maps a Jira issue to the {"id", "requirements"} rows batch_runner reads (description as markdown)."""
+    fields = issue.get("fields", {})
+    description = adf_to_markdown(fields.get("description"))
+    return {
+        "id": issue["key"],
+        "requirements": f"{fields.get('summary', '')}\n\n{description}".strip(),
+        "updated": fields.get("updated"),
+    }
+
+
+# ----------------------------
+# ASYNC CLIENT
+# ----------------------------
+class JiraClient:
+    """
+    Async Jira REST v3 client over one pooled httpx.AsyncClient.
+
+    At most `max_concurrency` requests are in flight. Retryable failures back
+    off exponentially with jitter, honouring Retry-After. Pass `transport`
+    (e.g. FakeJira().transport) to run against a local mock instead of Jira.
+    """
+
+    def __init__(self, base_url: str, email: str | None = None, api_token: str | None = None,
+                 max_concurrency: int = 8, max_retries: int = 4, backoff_seconds: float = 0.5,
+                 page_size: int = 100, timeout_seconds: float = 30.0, transport: httpx.AsyncBaseTransport | None = None):
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            auth=(email, api_token) if email and api_token else None,
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=timeout_seconds,
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_retries = max_retries
+        self._backoff = backoff_seconds
+        self.page_size = page_size
+
+    @classmethod
+    def from_config(cls, config: dict, transport: httpx.AsyncBaseTransport | None = None) -> "JiraClient":
+        """Builds a client from the environment and the `jira` section of config.json."""
+        load_dotenv()
+        jira_config = config.get("jira", {})
+        base_url = os.environ.get("JIRA_SERVER") or jira_config.get("server")
+        if not base_url:
+            raise JiraError("Set JIRA_SERVER (and JIRA_EMAIL / JIRA_API_TOKEN) to ingest from Jira")
+        return cls(
+            base_url,
+            os.environ.get("JIRA_EMAIL"),
+            os.environ.get("JIRA_API_TOKEN"),
+            max_concurrency=jira_config.get("max_concurrency", 8),
+            max_retries=jira_config.get("max_retries", 4),
+            backoff_seconds=jira_config.get("backoff_seconds", 0.5),
+            page_size=jira_config.get("page_size", 100),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "JiraClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._http.aclose()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Sends one request with retries. Raises JiraError on a final non-2xx/304 response."""
+        for attempt in range(self._max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await self._http.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self._max_retries:
+                    raise JiraError(f"{method} {url} failed: {e}") from e
+                await asyncio.sleep(self._delay(attempt, None))
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self._max_retries:
+                await asyncio.sleep(self._delay(attempt, response.headers.get("Retry-After")))
+                continue
+            if response.is_success or response.status_code == 304:
+                return response
+            raise JiraError(f"{method} {url} returned {response.status_code}: {response.text[:500]}", response.status_code)
+        raise AssertionError("unreachable")
+
+    def _delay(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self._backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def get_issue(self, key: str, fields: Iterable[str] = ISSUE_FIELDS) -> dict:
+        response = await self.request("GET", f"/rest/api/3/issue/{key}", params={"fields": ",".join(fields)})
+        return response.json()
+
+    async def get_issue_if_changed(self, key: str, etag: str | None, fields: Iterable[str] = ISSUE_FIELDS) -> tuple[dict | None, str | None]:
+        """Conditional GET: returns (None, etag) when the server answers 304 Not Modified, else (issue, new etag)."""
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await self.request("GET", f"/rest/api/3/issue/{key}", params={"fields": ",".join(fields)}, headers=headers)
+        if response.status_code == 304:
+            return None, etag
+        return response.json(), response.headers.get("ETag")
+
+    async def get_issues(self, keys: Iterable[str], fields: Iterable[str] = ISSUE_FIELDS) -> list[dict]:
+        """Fetches issues concurrently (bounded by max_concurrency), in the order given."""
+        fields = list(fields)
+        return await asyncio.gather(*(self.get_issue(key, fields) for key in keys))
+
+    async def search(self, jql: str, fields: Iterable[str] = ISSUE_FIELDS) -> AsyncIterator[dict]:
+        """
+        Yields every issue matching `jql`, page by page. Follows nextPageToken
+        on /search/jql; older servers without it (404) are paged through the
+        legacy /search endpoint with startAt/maxResults/total.
+        """
+        params: dict = {"jql": jql, "fields": ",".join(fields), "maxResults": self.page_size}
+        path = SEARCH_PATH
+        while True:
+            try:
+                response = await self.request("GET", path, params=params)
+            except JiraError as e:
+                if e.status_code != 404 or path != SEARCH_PATH or "nextPageToken" in params:
+                    raise
+                path, params["startAt"] = LEGACY_SEARCH_PATH, 0
+                continue
+            page = response.json()
+            issues = page.get("issues", [])
+            for issue in issues:
+                yield issue
+
+            if path == SEARCH_PATH:
+                if not page.get("nextPageToken") or page.get("isLast", False):
+                    return
+                params["nextPageToken"] = page["nextPageToken"]
+            else:
+                params["startAt"] += len(issues)
+                if not issues or params["startAt"] >= page.get("total", 0):
+                    return
+
+
+async def fetch_requirements(jql: str, config: dict | None = None, transport: httpx.AsyncBaseTransport | None = None) -> list[dict]:
+    """Every issue matching `jql` as batch_runner input rows."""
+    async with JiraClient.from_config(config or load_config(), transport=transport) as jira:
+        return [issue_to_requirement(issue) async for issue in jira.search(jql)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export Jira issues as a batch_runner backlog.")
+    parser.add_argument("--jql", required=True, help='e.g. "project = MDP ORDER BY key"')
+    parser.add_argument("--output", type=Path, default=Path("backlog.jsonl"))
+    args = parser.parse_args()
+
+    rows = asyncio.run(fetch_requirements(args.jql))
+    with args.output.open("w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    print(f"Wrote {len(rows)} issues to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Incremental Jira sync: only issues that changed since the last run are re-generated.
+
+    python batch_runner.py --jql "project = MDP" --incremental
+
+The issue list is fetched with just the `updated` field. Issues whose timestamp
+moved are re-fetched with If-None-Match, and an issue is sent back through the
+agents only when its requirement text differs from the text its last
+successful artifacts were generated from. State lives in `jira.cache_path`.
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from jira_ingest import JiraClient, issue_to_requirement
+from model_clients import load_config
+
+
+# ----------------------------
+# ISSUE CACHE
+# ----------------------------
+class IssueCache:
+    """
+    Local copy of synced Jira issues: `updated` timestamp, ETag, the requirement
+    text sent to the agents (and its hash) and the artifacts the last
+    successful run produced for it.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS issues ("
+            " key TEXT PRIMARY KEY, updated TEXT, etag TEXT, requirements TEXT, requirements_hash TEXT,"
+            " artifacts TEXT, generated_hash TEXT, synced_at TEXT)"
+        )
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM issues WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def store_issue(self, key: str, updated: str | None, etag: str | None, requirements: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO issues (key, updated, etag, requirements, requirements_hash, synced_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET updated = excluded.updated, etag = excluded.etag,"
+                " requirements = excluded.requirements, requirements_hash = excluded.requirements_hash,"
+                " synced_at = excluded.synced_at",
+                (key, updated, etag, requirements, _hash(requirements), datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def touch(self, key: str, updated: str | None) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE issues SET updated = ? WHERE key = ?", (updated, key))
+
+    def record_artifacts(self, key: str, requirements: str, artifacts: list[str]) -> None:
+        """Remembers what a successful run generated from exactly this requirement text."""
+        with self._lock:
+            self._conn.execute("UPDATE issues SET artifacts = ?, generated_hash = ? WHERE key = ?",
+                               (json.dumps(artifacts), _hash(requirements), key))
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ----------------------------
+# INCREMENTAL SYNC
+# ----------------------------
+@dataclass
+class SyncResult:
+    changed: list[dict] = field(default_factory=list)  # batch_runner rows still to generate
+    unchanged: list[dict] = field(default_factory=list)  # rows whose previous artifacts are reused
+    requests: dict = field(default_factory=lambda: {"listed": 0, "fetched": 0, "not_modified": 0})
+
+
+async def sync_issues(jira: JiraClient, jql: str, cache: IssueCache) -> SyncResult:
+    """
+    Lists `jql` with only the `updated` field, then fetches (with If-None-Match)
+    just the issues whose timestamp moved since the last sync. An issue is
+    re-generated only if its requirement text differs from the text its cached
+    artifacts were generated from; otherwise those artifacts are reused.
+    """
+    result = SyncResult()
+    listed = [issue async for issue in jira.search(jql, fields=["updated"])]
+    result.requests["listed"] = len(listed)
+
+    async def check(issue: dict) -> dict:
+        key, updated = issue["key"], issue.get("fields", {}).get("updated")
+        cached = cache.get(key)
+        if cached and cached["updated"] == updated and cached["requirements"] is not None:
+            return {"id": key, "requirements": cached["requirements"], "updated": updated}
+
+        full, etag = await jira.get_issue_if_changed(key, cached["etag"] if cached else None)
+        if full is None:
+            result.requests["not_modified"] += 1
+            cache.touch(key, updated)
+            return {"id": key, "requirements": cached["requirements"], "updated": updated}
+        result.requests["fetched"] += 1
+        row = issue_to_requirement(full)
+        cache.store_issue(key, row["updated"], etag, row["requirements"])
+        return row
+
+    for row in await asyncio.gather(*(check(issue) for issue in listed)):
+        cached = cache.get(row["id"])
+        # "[]" from a run that wrote nothing is not something to reuse
+        artifacts = json.loads(cached["artifacts"]) if cached and cached["artifacts"] else []
+        if artifacts and cached["generated_hash"] == _hash(row["requirements"]):
+            result.unchanged.append({**row, "artifacts": artifacts})
+        else:
+            result.changed.append(row)
+    return result
+
+
+def get_issue_cache(config: dict) -> IssueCache:
+    return IssueCache(Path(__file__).parent / config.get("jira", {}).get("cache_path", ".cache/jira_issues.sqlite"))
+
+
+async def sync_requirements(jql: str, config: dict | None = None,
+                            transport: httpx.AsyncBaseTransport | None = None) -> tuple[SyncResult, IssueCache]:
+    config = config or load_config()
+    cache = get_issue_cache(config)
+    async with JiraClient.from_config(config, transport=transport) as jira:
+        return await sync_issues(jira, jql, cache), cache
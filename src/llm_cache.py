@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from autogen_core import CacheStore
+from autogen_core.models import ChatCompletionClient, CreateResult
+from autogen_ext.models.cache import ChatCompletionCache
+
+
+# ----------------------------
+# PERSISTENT CACHE STORE
+# ----------------------------
+_connections: dict[str, tuple[sqlite3.Connection, threading.Lock]] = {}
+
+
+def _connect(path: Path) -> tuple[sqlite3.Connection, threading.Lock]:
+    """One SQLite connection per cache file, shared by every run in the process."""
+    key = str(path.resolve())
+    if key not in _connections:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        _connections[key] = (conn, threading.Lock())
+    return _connections[key]
+
+
+class SqliteCacheStore(CacheStore[Any]):
+    """
+    On-disk LRU store for model responses.
+
+    Keys are namespaced by model and temperature, since ChatCompletionCache only
+    hashes the messages, tools and create args. Least recently used entries are
+    evicted once either `max_entries` or `max_bytes` is exceeded.
+    """
+
+    def __init__(self, path: Path, namespace: str, max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024):
+        self._conn, self._lock = _connect(path)
+        self._namespace = namespace
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self._namespace}:{key}"
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (self._key(key),)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), self._key(key)))
+        self.hits += 1
+        # ChatCompletionCache rebuilds CreateResult objects from plain dicts.
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        if isinstance(value, list):
+            data = json.dumps([v.model_dump(mode="json") if isinstance(v, CreateResult) else v for v in value])
+        else:
+            data = json.dumps(value.model_dump(mode="json"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (self._key(key), data, len(data), time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        while count > self._max_entries or total > self._max_bytes:
+            # Drop the oldest tenth (at least one row) and re-check.
+            batch = max(1, count // 10, count - self._max_entries)
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (batch,),
+            )
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def with_response_cache(model_client: ChatCompletionClient, config: dict) -> tuple[ChatCompletionClient, SqliteCacheStore | None]:
+    """
+    Wraps `model_client` in a persistent response cache unless `llm_cache.enabled`
+    is false in config.json. Returns the client to hand to agents and the store
+    (or None when bypassed) so callers can report its hit ratio.
+    """
+    cache_config = config.get("llm_cache", {})
+    if not cache_config.get("enabled", True):
+        return model_client, None
+
+    model_name = config.get("ollama_model_name") if config.get("use_ollama") else config.get("openai_model_name")
+    store = SqliteCacheStore(
+        Path(__file__).parent / cache_config.get("path", ".cache/llm_cache.sqlite"),
+        namespace=f"{model_name}:{config.get('temperature', 0.1)}",
+        max_entries=cache_config.get("max_entries", 10000),
+        max_bytes=cache_config.get("max_size_mb", 256) * 1024 * 1024,
+    )
+    return ChatCompletionCache(model_client, store), store
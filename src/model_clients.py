@@ -0,0 +1,300 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncGenerator, Sequence
+
+import httpx
+
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from autogen_ext.models.openai import OpenAIChatCompletionClient, _model_info as openai_model_info
+from autogen_ext.models.ollama import OllamaChatCompletionClient, _model_info as ollama_model_info
+
+
+CONFIG_PATH = Path(__file__).parent / "config.json"
+
+# For models autogen has no entry for; "model_info" in config.json overrides either per provider.
+MODEL_CAPABILITIES = {
+    "ollama": {
+        "vision": False,
+        "function_calling": True,
+        "json_output": True,
+        "structured_output": True,
+        "family": "unknown"
+    },
+    "openai": {
+        "vision": False,
+        "function_calling": True,
+        "json_output": True,
+        "structured_output": False,
+        "family": "unknown"
+    }
+}
+
+
+# ----------------------------
+# CONFIG LOADING
+# ----------------------------
+_config_cache = {"key": None, "config": None}
+
+
+def load_config(path: Path | None = None) -> dict:
+    """Returns config.json (or CONFIG_PATH, if reassigned), re-reading it only when the file has changed on disk."""
+    path = path or CONFIG_PATH
+    key = (str(path), path.stat().st_mtime_ns)
+    if _config_cache["key"] != key:
+        _config_cache["config"] = json.loads(path.read_text())
+        _config_cache["key"] = key
+    return _config_cache["config"]
+
+
+# ----------------------------
+# CLIENT WRAPPERS
+# ----------------------------
+class ModelClientWrapper(ChatCompletionClient):
+    """Delegates every call to an inner client. Subclass and override create/create_stream."""
+
+    def __init__(self, client: ChatCompletionClient):
+        self._client = client
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs) -> CreateResult:
+        return await self._client.create(messages, **kwargs)
+
+    async def create_stream(self, messages: Sequence[LLMMessage], **kwargs) -> AsyncGenerator[str | CreateResult, None]:
+        async for chunk in self._client.create_stream(messages, **kwargs):
+            yield chunk
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self):
+        return self._client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
+
+
+class RateLimiter:
+    """
+    Spaces requests evenly to stay under `requests_per_minute`.
+    Uses a thread lock rather than asyncio primitives so it can be shared across event loops.
+    """
+
+    def __init__(self, requests_per_minute: float):
+        self._interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class RateLimitedChatCompletionClient(ModelClientWrapper):
+    def __init__(self, client: ChatCompletionClient, limiter: RateLimiter):
+        super().__init__(client)
+        self._limiter = limiter
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs) -> CreateResult:
+        await self._limiter.acquire()
+        return await self._client.create(messages, **kwargs)
+
+    async def create_stream(self, messages: Sequence[LLMMessage], **kwargs) -> AsyncGenerator[str | CreateResult, None]:
+        await self._limiter.acquire()
+        async for chunk in self._client.create_stream(messages, **kwargs):
+            yield chunk
+
+
+# One limiter per provider, shared by every client and run in the process.
+_rate_limiters: dict[str, RateLimiter] = {}
+
+
+def _rate_limiter(provider: str, config: dict) -> RateLimiter | None:
+    rpm = config.get("rate_limits", {}).get(provider, {}).get("requests_per_minute")
+    if not rpm:
+        return None
+    limiter = _rate_limiters.get(provider)
+    if limiter is None or limiter._interval != 60.0 / rpm:
+        limiter = _rate_limiters[provider] = RateLimiter(rpm)
+    return limiter
+
+
+# ----------------------------
+# CLIENT REGISTRY
+# ----------------------------
+@dataclass
+class _PooledClient:
+    client: ChatCompletionClient
+    fingerprint: str
+    loop: asyncio.AbstractEventLoop
+    last_used: float = field(default_factory=time.monotonic)
+    leases: int = 0  # runs currently using the client
+
+
+_registry: dict[tuple, _PooledClient] = {}
+# Evicted clients that runs are still streaming with; closed when their last lease is released
+_retired: list[_PooledClient] = []
+
+
+def _client_key(config: dict) -> tuple:
+    if config.get("use_ollama"):
+        return ("ollama", config.get("ollama_model_name"), config.get("temperature", 0.1))
+    return ("openai", config.get("openai_model_name"), config.get("temperature", 0.1))
+
+
+def model_info(config: dict) -> ModelInfo:
+    """
+    Capabilities of the configured model: autogen's entry for it when the
+    provider knows the model, else MODEL_CAPABILITIES for the provider, with
+    `model_info.<provider>` from config.json applied on top.
+    """
+    provider, model, _ = _client_key(config)
+    try:
+        info = dict((ollama_model_info if provider == "ollama" else openai_model_info).get_info(model))
+    except (KeyError, ValueError):
+        info = dict(MODEL_CAPABILITIES[provider])
+    info.update(config.get("model_info", {}).get(provider, {}))
+    return ModelInfo(**info)
+
+
+def _fingerprint(config: dict) -> str:
+    # The settings _build_client reads beyond the key; other config.json edits keep the client.
+    provider = _client_key(config)[0]
+    pool = config.get("client_pool", {})
+    return json.dumps({
+        "api_key": config.get("openai_api_key"),
+        "model_info": config.get("model_info", {}).get(provider),
+        "connections": [pool.get(k) for k in ("max_connections", "max_keepalive_connections", "keepalive_expiry_seconds")],
+        "rate_limit": config.get("rate_limits", {}).get(provider),
+    }, sort_keys=True, default=str)
+
+
+def _build_client(config: dict) -> ChatCompletionClient:
+    provider = _client_key(config)[0]
+    client = _build_provider_client(config)
+    limiter = _rate_limiter(provider, config)
+    return RateLimitedChatCompletionClient(client, limiter) if limiter else client
+
+
+def _build_provider_client(config: dict) -> ChatCompletionClient:
+    if config.get("use_ollama"):
+        # The ollama AsyncClient keeps its own httpx pool alive for as long as the client lives.
+        return OllamaChatCompletionClient(
+            model=config.get("ollama_model_name"),
+            temperature=config.get("temperature", 0.1),
+            model_info=model_info(config),
+        )
+
+    pool = config.get("client_pool", {})
+    limits = httpx.Limits(
+        max_connections=pool.get("max_connections", 20),
+        max_keepalive_connections=pool.get("max_keepalive_connections", 10),
+        keepalive_expiry=pool.get("keepalive_expiry_seconds", 120),
+    )
+    return OpenAIChatCompletionClient(
+        model=config.get("openai_model_name"),
+        temperature=config.get("temperature", 0.1),
+        model_info=model_info(config),
+        api_key=config.get("openai_api_key") if config.get("openai_api_key") != "" else os.environ.get("OPENAI_API_KEY"),
+        http_client=httpx.AsyncClient(limits=limits),
+    )
+
+
+async def _close(entry: _PooledClient) -> None:
+    # Clients are bound to the loop they were created on, so they are closed there.
+    if entry.loop is asyncio.get_running_loop():
+        await entry.client.close()
+    elif entry.loop.is_running():
+        asyncio.run_coroutine_threadsafe(entry.client.close(), entry.loop)
+    # A client whose loop has closed has nothing left to close it with
+
+
+async def _evict(key: tuple, force: bool = False) -> None:
+    entry = _registry.pop(key)
+    if entry.leases and not force:
+        _retired.append(entry)
+    else:
+        await _close(entry)
+
+
+async def get_model_client(config: dict | None = None) -> ChatCompletionClient:
+    """
+    Returns a shared model client for the configured provider, model and temperature.
+
+    The client (and its keep-alive connection pool) is reused across runs and only
+    rebuilt when the relevant config.json settings change. Clients idle for longer
+    than `client_pool.idle_timeout_seconds` are closed, and the registry is capped
+    at `client_pool.max_clients` entries, evicting the least recently used first.
+    Each call leases the client: hand it back with release_model_client()
+    instead of closing it, so an eviction never closes it mid-run.
+    """
+    config = config if config is not None else load_config()
+    pool = config.get("client_pool", {})
+    idle_timeout = pool.get("idle_timeout_seconds", 600)
+    max_clients = pool.get("max_clients", 4)
+
+    loop = asyncio.get_running_loop()
+    now = time.monotonic()
+    key = _client_key(config)
+    fingerprint = _fingerprint(config)
+
+    for other_key, entry in list(_registry.items()):
+        if now - entry.last_used > idle_timeout or entry.loop.is_closed():
+            await _evict(other_key)
+
+    entry = _registry.get(key)
+    if entry is not None and (entry.fingerprint != fingerprint or entry.loop is not loop):
+        await _evict(key)
+        entry = None
+
+    if entry is None:
+        while len(_registry) >= max_clients:
+            await _evict(min(_registry, key=lambda k: _registry[k].last_used))
+        entry = _PooledClient(_build_client(config), fingerprint, loop)
+        _registry[key] = entry
+
+    entry.last_used = now
+    entry.leases += 1
+    return entry.client
+
+
+async def release_model_client(client: ChatCompletionClient) -> None:
+    """Ends a lease from get_model_client; an evicted client is closed once its last lease ends."""
+    for entry in [*_registry.values(), *_retired]:
+        if entry.client is client:
+            entry.leases = max(entry.leases - 1, 0)
+            entry.last_used = time.monotonic()
+            if entry in _retired and not entry.leases:
+                _retired.remove(entry)
+                await _close(entry)
+            return
+
+
+async def close_model_clients() -> None:
+    """Closes every pooled client, leased or not. Call on process shutdown."""
+    for key in list(_registry):
+        await _evict(key, force=True)
+    while _retired:
+        await _close(_retired.pop())
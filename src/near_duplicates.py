@@ -0,0 +1,220 @@
+"""
+Near-duplicate detection for test cases with MinHash signatures and LSH buckets.
+
+    python near_duplicates.py build     # index every case in the test catalogue
+    python near_duplicates.py report    # list near-duplicate pairs in the corpus
+
+Each case is shingled into word 3-grams of its normalised steps and expected
+result. A 128-value MinHash signature estimates Jaccard similarity, and the
+signature is split into 16 bands of 8 rows. Only cases sharing at least one
+band bucket are compared, so a lookup touches a handful of candidates however
+large the corpus grows.
+"""
+import argparse
+import hashlib
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from model_clients import load_config
+from test_catalogue import get_catalogue, normalise_text
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+# ----------------------------
+# MINHASH
+# ----------------------------
+def shingles(case: dict, size: int = 3) -> set[str]:
+    """Word `size`-grams of a case; a shorter case is one shingle, so it only matches the same text."""
+    words = re.findall(r"\w+", normalise_text(f"{case.get('steps', '')} {case.get('expected_result', '')}"))
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """Vectorised MinHash over 32-bit shingle hashes (universal hashing mod 2^61-1)."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: set[str]) -> np.ndarray:
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=4).digest(), "little") for t in tokens],
+            dtype=np.uint64,
+        )
+        # (a*x + b) for every permutation x shingle at once; uint64 overflow wraps like the reference implementation
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+# ----------------------------
+# LSH INDEX
+# ----------------------------
+def case_key(namespace: str, case: dict) -> tuple[str, str]:
+    """The index key ("namespace:case_id") and display label ("namespace/case_id") of a case."""
+    return f"{namespace}:{case.get('case_id', '')}", f"{namespace}/{case.get('case_id', '')}"
+
+
+def catalogue_namespace(case: dict) -> str:
+    """The namespace of a catalogue case: its run_id, as written by the workflow, or its source file."""
+    return case.get("run_id") or case["source"]
+
+
+class NearDuplicateIndex:
+    """
+    Persistent LSH index of test-case signatures in SQLite.
+
+    `bands` x `rows` must equal the number of permutations; with 16 x 8 pairs
+    above roughly 0.7 similarity almost always share a bucket. Candidates are
+    then confirmed against `threshold` using their full signatures.
+    """
+
+    def __init__(self, path: Path, threshold: float = 0.8, bands: int = 16, rows: int = 8):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self._bands = bands
+        self._rows = rows
+        self._hasher = MinHasher(num_perm=bands * rows)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS signatures (key TEXT PRIMARY KEY, label TEXT, signature BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS buckets (band INTEGER NOT NULL, bucket INTEGER NOT NULL, key TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets(band, bucket);"
+        )
+
+    def _buckets(self, signature: np.ndarray) -> list[tuple[int, int]]:
+        return [
+            (band, int.from_bytes(hashlib.blake2b(signature[band * self._rows:(band + 1) * self._rows].tobytes(),
+                                                  digest_size=8).digest(), "little", signed=True))
+            for band in range(self._bands)
+        ]
+
+    def signature(self, case: dict) -> np.ndarray | None:
+        """The case's MinHash signature, or None for a case with no words (they would all look identical)."""
+        tokens = shingles(case)
+        return self._hasher.signature(tokens) if tokens else None
+
+    def query(self, case: dict, signature: np.ndarray | None = None) -> list[tuple[str, str, float]]:
+        """Returns (key, label, similarity) for indexed cases at or above the threshold, best first."""
+        signature = self.signature(case) if signature is None else signature
+        if signature is None:
+            return []
+        buckets = self._buckets(signature)
+        with self._lock:
+            candidates = {
+                key for band, bucket in buckets
+                for (key,) in self._conn.execute("SELECT key FROM buckets WHERE band = ? AND bucket = ?", (band, bucket))
+            }
+            matches = []
+            for key in candidates:
+                label, blob = self._conn.execute("SELECT label, signature FROM signatures WHERE key = ?", (key,)).fetchone()
+                score = similarity(signature, np.frombuffer(blob, dtype=np.uint64))
+                if score >= self.threshold:
+                    matches.append((key, label, score))
+        return sorted(matches, key=lambda m: m[2], reverse=True)
+
+    def add(self, key: str, case: dict, label: str = "", signature: np.ndarray | None = None) -> None:
+        signature = self.signature(case) if signature is None else signature
+        self.add_many([(key, label, signature)])
+
+    def add_many(self, items: list[tuple[str, str, np.ndarray]]) -> None:
+        """Indexes (key, label, signature) triples in one transaction, skipping keys already present and None signatures."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for key, label, signature in items:
+                if signature is None or self._conn.execute("SELECT 1 FROM signatures WHERE key = ?", (key,)).fetchone():
+                    continue
+                self._conn.execute("INSERT INTO signatures (key, label, signature) VALUES (?, ?, ?)",
+                                   (key, label, signature.tobytes()))
+                self._conn.executemany("INSERT INTO buckets (band, bucket, key) VALUES (?, ?, ?)",
+                                       [(band, bucket, key) for band, bucket in self._buckets(signature)])
+            self._conn.execute("COMMIT")
+
+    def remove_namespace(self, namespace: str) -> None:
+        """Drops every case indexed under `namespace`."""
+        prefix = f"{namespace}:"
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM buckets WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            self._conn.execute("DELETE FROM signatures WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            self._conn.execute("COMMIT")
+
+    def check_and_add(self, cases: list[dict], namespace: str) -> list[dict]:
+        """
+        Flags each case against the corpus and the cases before it in `cases`,
+        then indexes it. `cases` replaces whatever was indexed under `namespace`
+        before, so a rewrite is not flagged against its own earlier version.
+        Returns one {"case_id", "duplicate_of", "similarity"} dict per flagged case.
+        """
+        self.remove_namespace(namespace)
+        flagged = []
+        for case in cases:
+            signature = self.signature(case)
+            matches = self.query(case, signature) if signature is not None else []
+            if matches:
+                key, label, score = matches[0]
+                flagged.append({"case_id": case.get("case_id", ""), "duplicate_of": label or key, "similarity": round(score, 2)})
+            key, label = case_key(namespace, case)
+            self.add(key, case, label, signature)
+        return flagged
+
+
+_indexes: dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_near_duplicate_index(config: dict, force: bool = False) -> NearDuplicateIndex | None:
+    """Returns the shared index from `dedup` in config.json, or None when disabled (unless `force`)."""
+    dedup_config = config.get("dedup", {})
+    if not dedup_config.get("enabled", True) and not force:
+        return None
+    path = (Path(__file__).parent / dedup_config.get("path", ".cache/near_duplicates.sqlite")).resolve()
+    with _indexes_lock:
+        if str(path) not in _indexes:
+            _indexes[str(path)] = NearDuplicateIndex(path, threshold=dedup_config.get("threshold", 0.8))
+        return _indexes[str(path)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find near-duplicate test cases across generated outputs.")
+    parser.add_argument("command", choices=["build", "report"])
+    args = parser.parse_args()
+
+    config = load_config()
+    catalogue = get_catalogue(config, force=True)
+    index = get_near_duplicate_index(config, force=True)
+    cases = catalogue.search(distinct=True, limit=-1)
+    if args.command == "build":
+        # Same keys as check_and_add, so cases the workflow already indexed are skipped
+        index.add_many([(*case_key(catalogue_namespace(case), case), index.signature(case)) for case in cases])
+        print(f"Indexed {len(cases)} test cases")
+    else:
+        for case in cases:
+            key, label = case_key(catalogue_namespace(case), case)
+            for other, other_label, score in index.query(case):
+                if other > key:
+                    print(f"{score:.2f}  {label}  ~  {other_label}")
+
+
+if __name__ == "__main__":
+    main()
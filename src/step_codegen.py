@@ -0,0 +1,333 @@
+"""
+Step-definition skeletons generated from Gherkin without a model call.
+
+    python step_codegen.py feature.txt --language java    # or --language python
+
+Each distinct step becomes one behave function or one Cucumber-Java method.
+Quoted values, numbers and Scenario Outline <placeholders> turn into
+parameters, so "Given the user enters "a@b.c"" and "... "x@y.z"" share a
+single definition. StepTemplateAgent puts this in the team in place of the
+bdd_coder / step_definition_agent model turn. With a model client it spends
+one call filling in Selenium bodies, and keeps the skeleton if the reply does
+not hold up. Each run writes its own StepDefinition_<run_id> class or
+steps_<run_id> module, so the files of several runs can share one glue
+package / steps folder and call each other's steps.
+"""
+import argparse
+import re
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncGenerator, Callable, Literal, Sequence
+
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, TextMessage, ToolCallExecutionEvent
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, FunctionExecutionResult, SystemMessage, UserMessage
+
+from gherkin_parser import Feature, Step, parse_gherkin
+
+
+# ----------------------------
+# STEP PATTERNS
+# ----------------------------
+_PARAM = re.compile(
+    r'"(?P<dq>(?:[^"\\]|\\.)*)"'
+    r"|(?<!\w)'(?P<sq>[^']*)'(?!\w)"
+    r"|<(?P<placeholder>[A-Za-z_][\w \-]*)>"
+    r"|(?<![\w.])(?P<number>-?\d+(?:\.(?P<fraction>\d+))?)(?![\w.])"
+)
+_CUCUMBER_SPECIAL = re.compile(r"([\\(){}/])")
+
+
+@dataclass
+class Param:
+    kind: Literal["string", "any", "int", "float"]
+    name: str
+
+
+@dataclass
+class StepPattern:
+    keyword: str
+    behave: str  # parse-format expression for @given/@when/@then
+    cucumber: str  # Cucumber expression for @Given/@When/@Then
+    params: list[Param]
+    words: list[str]  # literal words, for function names
+    doc_string: bool = False
+    table: bool = False
+    text: str = ""  # the step it was read from
+
+    @property
+    def key(self) -> str:
+        """Steps with the same key are matched by the same definition."""
+        return normalise_expression(self.cucumber)
+
+
+def normalise_expression(expression: str) -> str:
+    """Case and whitespace do not tell two step expressions apart."""
+    return " ".join(expression.lower().split())
+
+
+def _identifier(text: str) -> str:
+    return re.sub(r"\W+", "_", text.strip().lower()).strip("_") or "value"
+
+
+def step_pattern(step: Step) -> StepPattern:
+    behave, cucumber, params, words = [], [], [], []
+    used: dict[str, int] = {}
+
+    def name_for(base: str) -> str:
+        used[base] = used.get(base, 0) + 1
+        return base if used[base] == 1 else f"{base}{used[base]}"
+
+    position = 0
+    for match in _PARAM.finditer(step.text):
+        literal = step.text[position:match.start()]
+        behave.append(literal.replace("{", "{{").replace("}", "}}"))
+        cucumber.append(_CUCUMBER_SPECIAL.sub(r"\\\1", literal))
+        words += re.findall(r"[A-Za-z0-9]+", literal)
+        position = match.end()
+
+        if match.group("number") is not None:
+            is_float = match.group("fraction") is not None
+            param = Param("float" if is_float else "int", name_for("number"))
+            behave.append(f"{{{param.name}:{'g' if is_float else 'd'}}}")
+            cucumber.append("{double}" if is_float else "{int}")
+        elif match.group("placeholder") is not None:
+            param = Param("any", name_for(_identifier(match.group("placeholder"))))
+            behave.append(f"{{{param.name}}}")
+            cucumber.append("{}")
+        else:
+            quote = '"' if match.group("dq") is not None else "'"
+            inner = match.group("dq") if quote == '"' else match.group("sq")
+            placeholder = re.fullmatch(r"<([A-Za-z_][\w \-]*)>", inner)
+            param = Param("string", name_for(_identifier(placeholder.group(1)) if placeholder else "text"))
+            behave.append(f"{quote}{{{param.name}}}{quote}")
+            cucumber.append("{string}")
+        params.append(param)
+
+    literal = step.text[position:]
+    behave.append(literal.replace("{", "{{").replace("}", "}}"))
+    cucumber.append(_CUCUMBER_SPECIAL.sub(r"\\\1", literal))
+    words += re.findall(r"[A-Za-z0-9]+", literal)
+    return StepPattern(step.keyword, "".join(behave), "".join(cucumber), params, words,
+                       doc_string=step.doc_string is not None, table=step.table is not None, text=step.text)
+
+
+def unique_patterns(features: Sequence[Feature], language: Literal["java", "python"] = "java") -> list[StepPattern]:
+    """
+    One pattern per distinct step. Cucumber matches a definition whatever the
+    keyword (and rejects duplicates across keywords), so for Java the first
+    keyword wins; behave registers steps per keyword.
+    """
+    seen: dict[tuple[str, str], StepPattern] = {}
+    for feature in features:
+        for step in feature.steps():
+            pattern = step_pattern(step)
+            seen.setdefault((pattern.keyword if language == "python" else "", pattern.key), pattern)
+    return list(seen.values())
+
+
+def _unique_name(base: str, taken: set[str]) -> str:
+    name, n = base, 2
+    while name in taken:
+        name, n = f"{base}{n}", n + 1
+    taken.add(name)
+    return name
+
+
+# ----------------------------
+# GENERATORS
+# ----------------------------
+def step_file_name(language: Literal["java", "python"], run_id: str | None = None) -> str:
+    """The class (Java) or module (Python) name a run's generated step definitions go in."""
+    base = "StepDefinition" if language == "java" else "steps"
+    return f"{base}_{run_id}" if run_id else base
+
+
+def _reused_comment(reused: Sequence[tuple[StepPattern, str]], prefix: str) -> list[str]:
+    if not reused:
+        return []
+    lines = [f"{prefix} Already defined in earlier runs, not generated again:"]
+    lines += [f"{prefix}   {pattern.keyword} {pattern.text}  ->  {source}" for pattern, source in reused]
+    return lines
+
+
+def behave_steps(patterns: Sequence[StepPattern], reused: Sequence[tuple[StepPattern, str]] = ()) -> str:
+    """A behave steps module with a `pass` body per pattern (see unique_patterns)."""
+    lines = ["from behave import given, when, then", ""] + _reused_comment(reused, "#")
+    taken: set[str] = set()
+    for pattern in patterns:
+        keyword = pattern.keyword.lower()
+        name = _unique_name("_".join([keyword] + [w.lower() for w in pattern.words])[:80], taken)
+        args = ", ".join(["context"] + [p.name for p in pattern.params])
+        lines += ["", f"@{keyword}({pattern.behave!r})", f"def {name}({args}):"]
+        if pattern.doc_string:
+            lines.append("    # the doc string is in context.text")
+        if pattern.table:
+            lines.append("    # the data table is in context.table")
+        lines.append("    pass")
+        lines.append("")
+    return "\n".join(lines)
+
+
+_JAVA_TYPES = {"string": "String", "any": "String", "int": "int", "float": "double"}
+
+
+def _java_string(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def java_steps(patterns: Sequence[StepPattern], class_name: str = "StepDefinition",
+               reused: Sequence[tuple[StepPattern, str]] = ()) -> str:
+    """A Cucumber-Java step class whose methods throw PendingException until implemented."""
+    keywords = sorted({p.keyword for p in patterns}, key=["Given", "When", "Then"].index)
+    imports = [f"import io.cucumber.java.en.{keyword};" for keyword in keywords]
+    if patterns:
+        imports.append("import io.cucumber.java.PendingException;")
+    if any(p.table for p in patterns):
+        imports.append("import io.cucumber.datatable.DataTable;")
+    imports.append("import org.openqa.selenium.WebDriver;")
+
+    lines = imports + [""] + _reused_comment(reused, "//")
+    lines += [f"public class {class_name} {{", "", "    private WebDriver driver;", ""]
+    taken: set[str] = set()
+    for pattern in patterns:
+        words = [w.lower() for w in pattern.words] or ["step"]
+        name = _unique_name((words[0] + "".join(w.capitalize() for w in words[1:]))[:80], taken)
+        if name[0].isdigit():
+            name = "step" + name
+        args = [f"{_JAVA_TYPES[p.kind]} {_java_name(p.name)}" for p in pattern.params]
+        if pattern.doc_string:
+            args.append("String docString")
+        if pattern.table:
+            args.append("DataTable dataTable")
+        lines += [
+            f"    @{pattern.keyword}({_java_string(pattern.cucumber)})",
+            f"    public void {name}({', '.join(args)}) {{",
+            "        // Write code here that turns the phrase above into concrete actions",
+            "        throw new PendingException();",
+            "    }",
+            "",
+        ]
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def _java_name(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.capitalize() for part in rest)
+
+
+# ----------------------------
+# TEAM AGENT
+# ----------------------------
+FILL_BODIES_PROMPT = """You implement Cucumber-Java step definitions with Selenium WebDriver.
+Replace each `throw new PendingException();` with a plausible Selenium implementation
+(driver.findElement(...) with By.id/By.name/By.cssSelector, assertions for Then steps).
+Keep the class name, annotations, expressions and method signatures exactly as given.
+Reply with the complete Java class only."""
+
+
+class StepTemplateAgent(BaseChatAgent):
+    """
+    Writes step definitions for the Gherkin in the conversation without a model
+    turn. The file is reported as a write_java_file / write_file tool result,
+    so the UI, tracing and ArtifactTermination treat it like the tool-calling
+    agents' output. `model_client` (Java only) fills in the method bodies.
+    With a step_registry.StepRegistry, steps other runs already defined are
+    listed in a comment instead of being generated again. `write(name, code)`
+    stores the class or module named by step_file_name for the run `run_id()`.
+    """
+
+    def __init__(self, name: str, language: Literal["java", "python"], write: Callable[[str, str], Path],
+                 model_client: ChatCompletionClient | None = None, registry=None,
+                 run_id: Callable[[], str | None] = lambda: None,
+                 description: str = "Generates step definitions from the Gherkin feature."):
+        super().__init__(name, description)
+        self._language = language
+        self._write = write
+        self._model_client = model_client
+        self._registry = registry
+        self._run_id = run_id
+        self._feature_text: str | None = None
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return (TextMessage,)
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken) -> Response:
+        response = None
+        async for item in self.on_messages_stream(messages, cancellation_token):
+            if isinstance(item, Response):
+                response = item
+        return response
+
+    async def on_messages_stream(self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+                                 ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | Response, None]:
+        for message in messages:
+            if message.source != self.name and "Feature:" in message.to_text():
+                self._feature_text = message.to_text()
+        features = parse_gherkin(self._feature_text or "")
+        if not features or not any(f.steps() for f in features):
+            yield Response(chat_message=TextMessage(source=self.name, content="No Gherkin feature with steps to generate step definitions from."))
+            return
+
+        run_id = self._run_id()
+        patterns, reused = unique_patterns(features, self._language), []
+        if self._registry is not None:
+            patterns, reused = self._registry.partition(patterns, self._language, exclude_run=run_id)
+
+        usage = None
+        file_name = step_file_name(self._language, run_id)
+        if self._language == "python":
+            code, tool = behave_steps(patterns, reused), "write_file"
+        else:
+            code, tool = java_steps(patterns, file_name, reused), "write_java_file"
+            if self._model_client is not None and patterns:
+                code, usage = await self._fill_bodies(code, file_name, cancellation_token)
+
+        path = self._write(file_name, code)
+        event = ToolCallExecutionEvent(source=self.name, content=[FunctionExecutionResult(
+            content=str({"path": str(path)}), name=tool, call_id=f"template-{uuid.uuid4().hex[:8]}", is_error=False,
+        )])
+        yield event
+        summary = f"Generated {len(patterns)} step definitions for '{features[0].name}' in {path}"
+        if reused:
+            summary += f" ({len(reused)} already defined in earlier runs)"
+        yield Response(
+            chat_message=TextMessage(source=self.name, models_usage=usage, content=summary),
+            inner_messages=[event],
+        )
+
+    async def _fill_bodies(self, skeleton: str, class_name: str, cancellation_token: CancellationToken):
+        result = await self._model_client.create(
+            [SystemMessage(content=FILL_BODIES_PROMPT),
+             UserMessage(content=f"Feature:\n{self._feature_text}\n\nStep definitions:\n{skeleton}", source=self.name)],
+            cancellation_token=cancellation_token,
+        )
+        text = str(result.content)
+        fenced = re.search(r"```(?:java)?\s*\n(.*?)```", text, re.DOTALL)
+        code = fenced.group(1) if fenced else text
+        # Keep the reply only if every generated step definition survived
+        if f"class {class_name} " in code and code.count("@") >= skeleton.count("    @"):
+            return code, result.usage
+        return skeleton, result.usage
+
+    async def on_reset(self, cancellation_token: CancellationToken) -> None:
+        self._feature_text = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate step-definition skeletons from a Gherkin feature.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--language", choices=["java", "python"], default="java")
+    args = parser.parse_args()
+
+    patterns = unique_patterns(parse_gherkin(args.path.read_text(encoding="utf-8")), args.language)
+    print(java_steps(patterns) if args.language == "java" else behave_steps(patterns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Registry of every step definition generated so far, so a run only generates the new ones.
+
+    python step_registry.py ingest              # register the steps in every StepDefinition.java / steps*.py
+    python step_registry.py match feature.txt   # which steps of a feature are new
+    python step_registry.py stats
+
+Definitions are read from generated Cucumber-Java classes and behave modules
+(as they are committed, or in bulk with `ingest`). Each is stored with its
+normalised Cucumber expression, so steps generated from the same phrasing
+("the user enters {string}") are found with one indexed lookup. Definitions
+written as regular expressions ("^the user enters \"([^\"]*)\"$"), or with
+other parameter names and types, are compiled to a regex over step text and
+tried against the concrete step; only definitions sharing the step's first
+word (or starting with a parameter) are tried.
+
+StepTemplateAgent skips the registered steps. In LLM mode, StepRegistryMemory
+lists them in the writer's model context instead. Lookups leave out the current
+run's own steps, so regenerating the steps within a run does not point at itself.
+"""
+import argparse
+import ast
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Literal, Pattern, Sequence
+
+from autogen_core import CancellationToken
+from autogen_core.memory import Memory, MemoryContent, MemoryMimeType, MemoryQueryResult, UpdateContextResult
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import SystemMessage
+
+from context_policy import replace_note
+from gherkin_parser import parse_gherkin
+from model_clients import load_config
+from step_codegen import StepPattern, normalise_expression, unique_patterns
+
+
+_KNOWN_STEPS = "These steps are already defined by step definitions from earlier runs."
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    language TEXT NOT NULL,
+    keyword TEXT NOT NULL,          -- '' when any keyword matches (Cucumber, behave @step)
+    expression TEXT NOT NULL,       -- as written in the source
+    key TEXT,                       -- normalised Cucumber expression; NULL for regular expressions
+    pattern TEXT NOT NULL,          -- regex over the step text
+    anchor TEXT NOT NULL,           -- first literal word; '' when the expression starts with a parameter
+    source TEXT NOT NULL,
+    run_id TEXT,                    -- the workflow run that generated it; NULL for ingested folders
+    created TEXT NOT NULL,
+    UNIQUE (language, keyword, expression)
+);
+CREATE INDEX IF NOT EXISTS steps_key ON steps(language, key);
+CREATE INDEX IF NOT EXISTS steps_anchor ON steps(language, anchor);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+_CUCUMBER_TYPES = {
+    "string": r"(?:\"[^\"]*\"|'[^']*')",
+    "int": r"-?\d+",
+    "byte": r"-?\d+",
+    "short": r"-?\d+",
+    "long": r"-?\d+",
+    "biginteger": r"-?\d+",
+    "float": r"-?\d*[.,]?\d+(?:[eE]-?\d+)?",
+    "double": r"-?\d*[.,]?\d+(?:[eE]-?\d+)?",
+    "bigdecimal": r"-?\d*[.,]?\d+(?:[eE]-?\d+)?",
+    "word": r"[^\s]+",
+    "": r".*",
+}
+_PARSE_TYPES = {"d": ("int", r"-?\d+"), "n": ("int", r"-?[\d,]+"), "g": ("double", r"-?\d*\.?\d+(?:[eE]-?\d+)?"),
+                "f": ("double", r"-?\d*\.?\d+"), "w": ("word", r"\w+")}
+_CUCUMBER_TOKEN = re.compile(r"\\(.)|\{(\w*)\}|\(([^()]*)\)", re.DOTALL)
+_PARSE_TOKEN = re.compile(r"\{\{|\}\}|([\"']?)\{(\w*)(?::(\w*))?\}\1|[^{}\"']+|.")
+_CUCUMBER_SPECIAL = re.compile(r"([\\(){}/])")
+
+
+# ----------------------------
+# EXPRESSIONS
+# ----------------------------
+def _anchor(text: str) -> str:
+    """The bucket a step is looked up in: its first word."""
+    match = re.match(r"[A-Za-z0-9]+", text.strip())
+    return match.group(0).lower() if match else ""
+
+
+def _literal_anchor(prefix: str, whole: bool) -> str:
+    """The bucket of a definition whose literal text starts with `prefix`; '' puts it in every bucket."""
+    match = re.match(r"([A-Za-z0-9]+)(?:\s|$)" if whole else r"([A-Za-z0-9]+)\s", prefix)
+    return match.group(1).lower() if match else ""
+
+
+def _regex_anchor(body: str) -> str:
+    """The first word of a regex when it is plain text that every match must start with."""
+    match = re.match(r"([A-Za-z0-9]+)(?: |\\s)", body)
+    return match.group(1).lower() if match and "|" not in body else ""
+
+
+def _cucumber_literal(text: str) -> str:
+    # a/b is an alternation of words
+    return "".join(
+        "(?:" + "|".join(re.escape(word) for word in part.split("/")) + ")" if "/" in part else re.escape(part)
+        for part in re.split(r"(\s+)", text)
+    )
+
+
+def cucumber_definition(expression: str) -> tuple[str | None, str, str]:
+    """(key, regex, anchor) of a Cucumber-Java annotation value, which may be a Cucumber expression or a regex."""
+    if expression.startswith("^") or expression.endswith("$"):
+        body = expression.lstrip("^").rstrip("$")
+        return None, body, _regex_anchor(body)
+    parts, position = [], 0
+    for match in _CUCUMBER_TOKEN.finditer(expression):
+        parts.append(_cucumber_literal(expression[position:match.start()]))
+        position = match.end()
+        escaped, param, optional = match.groups()
+        if escaped is not None:
+            parts.append(re.escape(escaped))
+        elif optional is not None:
+            parts.append(f"(?:{re.escape(optional)})?")
+        else:
+            parts.append(_CUCUMBER_TYPES.get(param.lower(), r".*"))
+    parts.append(_cucumber_literal(expression[position:]))
+    first = _CUCUMBER_TOKEN.search(expression)
+    anchor = _literal_anchor(expression[:first.start()] if first else expression, whole=first is None)
+    return normalise_expression(expression), "".join(parts), anchor
+
+
+def behave_definition(expression: str, matcher: str = "parse") -> tuple[str | None, str, str]:
+    """(key, regex, anchor) of a behave decorator argument, read with the "parse" or "re" step matcher."""
+    if matcher == "re":
+        body = expression.lstrip("^").rstrip("$")
+        return None, body, _regex_anchor(body)
+    key, parts = [], []
+    for match in _PARSE_TOKEN.finditer(expression):
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            key.append("\\" + token[0])
+            parts.append(re.escape(token[0]))
+        elif match.group(2) is not None:
+            quote, spec = match.group(1), match.group(3) or ""
+            kind, regex = _PARSE_TYPES.get(spec, ("", r".+?"))
+            if quote:
+                key.append("{string}")
+                parts.append(f"{quote}{regex}{quote}")
+            else:
+                key.append(f"{{{kind}}}")
+                parts.append(regex)
+        else:
+            key.append(_CUCUMBER_SPECIAL.sub(r"\\\1", token))
+            parts.append(re.escape(token))
+    first = re.search(r"\{", expression)
+    anchor = _literal_anchor(expression[:first.start()] if first else expression, whole=first is None)
+    return normalise_expression("".join(key)), "".join(parts), anchor
+
+
+# ----------------------------
+# SOURCE FILES
+# ----------------------------
+_JAVA_ANNOTATION = re.compile(r"@(Given|When|Then|And|But)\s*\(\s*\"((?:[^\"\\]|\\.)*)\"\s*\)")
+_BEHAVE_KEYWORDS = {"given": "Given", "when": "When", "then": "Then", "step": ""}
+
+
+def java_definitions(code: str) -> list[tuple[str, str]]:
+    """(keyword, expression) for every step annotation in a Java class; Cucumber ignores the keyword."""
+    return [("", re.sub(r"\\(.)", r"\1", match.group(2))) for match in _JAVA_ANNOTATION.finditer(code)]
+
+
+def behave_definitions(code: str) -> list[tuple[str, str, str]]:
+    """(keyword, expression, matcher) for every @given/@when/@then/@step in a behave module."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return [(_BEHAVE_KEYWORDS[m.group(1)], m.group(3), "parse") for m in
+                re.finditer(r"^@(given|when|then|step)\(\s*u?(['\"])(.*?)(?<!\\)\2", code, re.MULTILINE)]
+    definitions, matcher = [], "parse"
+    for node in tree.body:
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            call = node.value
+            if getattr(call.func, "id", getattr(call.func, "attr", "")) in ("use_step_matcher", "step_matcher") and call.args:
+                matcher = getattr(call.args[0], "value", matcher)
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if not (isinstance(decorator, ast.Call) and decorator.args and isinstance(decorator.args[0], ast.Constant)):
+                continue
+            name = getattr(decorator.func, "id", getattr(decorator.func, "attr", "")).lower()
+            if name in _BEHAVE_KEYWORDS and isinstance(decorator.args[0].value, str):
+                definitions.append((_BEHAVE_KEYWORDS[name], decorator.args[0].value, matcher))
+    return definitions
+
+
+def _language(path: Path) -> str | None:
+    if path.suffix == ".java":
+        return "java"
+    if path.suffix == ".py" and path.name.startswith("steps"):
+        return "python"
+    return None
+
+
+# ----------------------------
+# REGISTRY
+# ----------------------------
+class StepRegistry:
+    """
+    SQLite registry of step definitions, looked up by normalised expression
+    (B-tree index) and then by regex within the step's first-word bucket.
+    Compiled regexes are cached per definition. Safe to share between threads.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        if "run_id" not in {row["name"] for row in self._conn.execute("PRAGMA table_info(steps)")}:
+            # registries created before steps were tagged with their run
+            self._conn.execute("ALTER TABLE steps ADD COLUMN run_id TEXT")
+        self._lock = threading.Lock()
+        self._compiled: dict[int, Pattern | None] = {}
+
+    def add_code(self, code: str, language: Literal["java", "python"], source: str, run_id: str | None = None) -> int:
+        """
+        Registers the step definitions in a Java class or behave module, replacing
+        the ones registered from `source` before. Returns how many were new.
+        """
+        rows = []
+        if language == "java":
+            for keyword, expression in java_definitions(code):
+                rows.append((keyword, expression, *cucumber_definition(expression)))
+        else:
+            for keyword, expression, matcher in behave_definitions(code):
+                rows.append((keyword, expression, *behave_definition(expression, matcher)))
+        created = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.execute("BEGIN")
+            if self._conn.execute("DELETE FROM steps WHERE source = ?", (source,)).rowcount:
+                self._compiled.clear()  # deleted ids can be handed out again
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO steps (language, keyword, expression, key, pattern, anchor, source, run_id, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(language, keyword, expression, key, pattern, anchor, source, run_id, created)
+                 for keyword, expression, key, pattern, anchor in rows],
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def ingest_file(self, path: Path, run_id: str | None = None) -> int:
+        """Registers a generated step file; unchanged files (same mtime and size) are skipped."""
+        language = _language(path)
+        if language is None:
+            return 0
+        path = path.resolve()
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns, size FROM sources WHERE path = ?", (str(path),)).fetchone()
+        if row and row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+            return 0
+        added = self.add_code(path.read_text(encoding="utf-8", errors="replace"), language, str(path), run_id)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sources (path, mtime_ns, size) VALUES (?, ?, ?)",
+                               (str(path), stat.st_mtime_ns, stat.st_size))
+        return added
+
+    def ingest_dir(self, root: Path) -> int:
+        return sum(self.ingest_file(path) for pattern in ("**/*.java", "**/steps*.py") for path in sorted(root.glob(pattern)))
+
+    def _regex(self, row: sqlite3.Row) -> Pattern | None:
+        if row["id"] not in self._compiled:
+            try:
+                self._compiled[row["id"]] = re.compile(row["pattern"], re.IGNORECASE)
+            except re.error:
+                self._compiled[row["id"]] = None
+        return self._compiled[row["id"]]
+
+    def find(self, pattern: StepPattern, language: Literal["java", "python"], exclude_run: str | None = None
+             ) -> sqlite3.Row | None:
+        """The registered definition that would run `pattern`'s step, if any, leaving out `exclude_run`'s own steps."""
+        keywords = ("", pattern.keyword if language == "python" else "")
+        not_run = "AND (? IS NULL OR run_id IS NOT ?)"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT * FROM steps WHERE language = ? AND key = ? AND keyword IN (?, ?) {not_run} LIMIT 1",
+                (language, pattern.key, *keywords, exclude_run, exclude_run),
+            ).fetchone()
+            if row is not None or not pattern.text:
+                return row
+            candidates = self._conn.execute(
+                f"SELECT * FROM steps WHERE language = ? AND anchor IN (?, '') AND keyword IN (?, ?) {not_run} ORDER BY id",
+                (language, _anchor(pattern.text), *keywords, exclude_run, exclude_run),
+            ).fetchall()
+            for row in candidates:
+                regex = self._regex(row)
+                if regex is not None and regex.fullmatch(pattern.text):
+                    return row
+        return None
+
+    def partition(self, patterns: Sequence[StepPattern], language: Literal["java", "python"], exclude_run: str | None = None
+                  ) -> tuple[list[StepPattern], list[tuple[StepPattern, str]]]:
+        """Splits `patterns` into the new ones and (pattern, source) for the ones other runs already registered."""
+        new, reused = [], []
+        for pattern in patterns:
+            row = self.find(pattern, language, exclude_run)
+            if row is None:
+                new.append(pattern)
+            else:
+                reused.append((pattern, row["source"]))
+        return new, reused
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT language, COUNT(*) AS steps, COUNT(key) AS expressions, COUNT(DISTINCT source) AS files "
+                "FROM steps GROUP BY language"
+            ).fetchall()
+        return {row["language"]: {k: row[k] for k in ("steps", "expressions", "files")} for row in rows}
+
+
+# ----------------------------
+# MODEL CONTEXT
+# ----------------------------
+class StepRegistryMemory(Memory):
+    """
+    Tells a model-driven step writer which steps of the latest feature in the
+    conversation are already defined, so it does not write them again
+    (Cucumber and behave both reject two definitions of one step). `run_id`
+    returns the current run, whose own steps are not listed.
+    """
+
+    def __init__(self, registry: StepRegistry, language: Literal["java", "python"],
+                 run_id: Callable[[], str | None] = lambda: None):
+        self._registry = registry
+        self._language = language
+        self._run_id = run_id
+
+    async def update_context(self, model_context: ChatCompletionContext) -> UpdateContextResult:
+        await replace_note(model_context, _KNOWN_STEPS)
+        messages = await model_context.get_messages()
+        feature = next((m.content for m in reversed(messages) if isinstance(m.content, str) and "Feature:" in m.content), "")
+        result = await self.query(feature)
+        if result.results:
+            listing = "\n".join(f"- {m.content}" for m in result.results)
+            await model_context.add_message(SystemMessage(content=(
+                f"{_KNOWN_STEPS} Do not define them again; write only the other steps:\n{listing}"
+            )))
+        return UpdateContextResult(memories=result)
+
+    async def query(self, query: str | MemoryContent, cancellation_token: CancellationToken | None = None, **kwargs) -> MemoryQueryResult:
+        text = query if isinstance(query, str) else str(query.content)
+        patterns = unique_patterns(parse_gherkin(text), self._language)
+        results = []
+        for pattern in patterns:
+            row = self._registry.find(pattern, self._language, self._run_id())
+            if row is not None:
+                results.append(MemoryContent(
+                    content=f"{pattern.keyword} {pattern.text}  ->  {row['keyword'] or pattern.keyword} \"{row['expression']}\" in {Path(row['source']).name}",
+                    mime_type=MemoryMimeType.TEXT, metadata={"source": row["source"]},
+                ))
+        return MemoryQueryResult(results=results)
+
+    async def add(self, content: MemoryContent, cancellation_token: CancellationToken | None = None) -> None:
+        # registered from the committed step files (StepRegistry.ingest_file)
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+_registries: dict[str, StepRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_step_registry(config: dict, force: bool = False) -> StepRegistry | None:
+    """Returns the shared registry from `step_registry` in config.json, or None when disabled (unless `force`)."""
+    registry_config = config.get("step_registry", {})
+    if not registry_config.get("enabled", True) and not force:
+        return None
+    path = (Path(__file__).parent / registry_config.get("path", ".cache/step_registry.sqlite")).resolve()
+    with _registries_lock:
+        if str(path) not in _registries:
+            _registries[str(path)] = StepRegistry(path)
+        return _registries[str(path)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Registry of previously generated step definitions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Register the step files under a folder")
+    ingest.add_argument("folder", type=Path, nargs="?", default=Path(__file__).parent.parent / "outputs")
+    match = commands.add_parser("match", help="Show which steps of a feature file are already defined")
+    match.add_argument("path", type=Path)
+    match.add_argument("--language", choices=["java", "python"], default="java")
+    commands.add_parser("stats", help="Count registered steps")
+    args = parser.parse_args()
+
+    registry = get_step_registry(load_config(), force=True)
+    if args.command == "ingest":
+        print(f"Registered {registry.ingest_dir(args.folder)} new step definitions from {args.folder}")
+    elif args.command == "match":
+        features = parse_gherkin(args.path.read_text(encoding="utf-8"))
+        new, reused = registry.partition(unique_patterns(features, args.language), args.language)
+        for pattern, source in reused:
+            print(f"defined  {pattern.keyword} {pattern.text}  ->  {source}")
+        for pattern in new:
+            print(f"new      {pattern.keyword} {pattern.text}")
+    else:
+        for language, counts in registry.stats().items():
+            print(f"{language}: {counts['steps']} steps ({counts['expressions']} as expressions) in {counts['files']} files")
+
+
+if __name__ == "__main__":
+    main()
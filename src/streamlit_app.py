@@ -1,6 +1,7 @@
+import re
 import streamlit as st
-import asyncio
-from autogen_workflow import run_autogen_workflow
+import time
+from background_loop import WorkflowRunner
 from pathlib import Path
 import json
 st.set_page_config(layout="wide")
@@ -32,6 +33,7 @@ if 'agents' not in st.session_state:
         'test_case_writer': True,
         'step_definition_writer': True
     }
+st.session_state.agents.setdefault('test_case_reviewer', False)
 
 # Handle checkbox dependencies
 def update_checkboxes():
@@ -41,6 +43,9 @@ def update_checkboxes():
     # Dependency: If Test Case Writer is unchecked, Step Definition Writer must be unchecked.
     elif not st.session_state.agents['test_case_writer']:
         st.session_state.agents['step_definition_writer'] = False
+    # Dependency: the Test Case Reviewer reviews the Test Case Writer's output.
+    if st.session_state.agents['test_case_reviewer']:
+        st.session_state.agents['test_case_writer'] = True
 
 # Determine which checkboxes should be disabled
 agent_states = st.session_state.agents
@@ -75,34 +80,169 @@ st.session_state.agents['step_definition_writer'] = st.sidebar.checkbox(
     # disabled=step_def_disabled
 )
 
+# Reviews the test cases (local ISTQB checks first) until it approves them
+st.session_state.agents['test_case_reviewer'] = st.sidebar.checkbox(
+    "Test Case Reviewer",
+    value=st.session_state.agents['test_case_reviewer'],
+    key='test_case_reviewer_checkbox',
+    on_change=update_checkboxes,
+)
+
 # Main app layout
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-async def stream_workflow(prompt: str):
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+
+
+class AgentSegment:
+    """
+    One speaker's output inside the assistant chat message.
+
+    Text is kept in fixed-size blocks: once the live tail grows past `block_chars`
+    it is frozen into its own placeholder at a line break and never re-rendered,
+    so each update costs the same however long the conversation or CSV gets.
+    A block that ends inside a ``` fence is rendered with the fence closed and
+    the tail reopens it. A block cut inside a markdown table hands the table's
+    header and separator rows on to the next block, so both render as tables.
+    """
+
+    def __init__(self, container, source: str, block_chars: int):
+        self.container = container
+        self.source = source
+        self.block_chars = block_chars
+        self.frozen = []
+        self.frozen_placeholders = []
+        container.markdown(f"**{source}:**")
+        self.tail = ""
+        self.fence = ""  # the opening ``` line when the frozen text ends inside a code block
+        self.table_head = ""  # header and separator rows when the frozen text ends inside a table
+        self._last_row = None  # the last frozen line, when it is a table row
+        self.tail_placeholder = container.empty()
+
+    def _cut(self) -> int:
+        """The last line break within `block_chars` that does not part a table header from its separator."""
+        cut = self.tail.rfind("\n", 0, self.block_chars)
+        while cut > 0:
+            after = self.tail[cut + 1:].split("\n", 1)[0]
+            if not (after.lstrip().startswith("|") and _TABLE_SEPARATOR.match(after)):
+                return cut
+            cut = self.tail.rfind("\n", 0, cut)
+        return cut
+
+    def _prefix(self, text: str) -> str:
+        """What a block starting with `text` repeats from the frozen text before it."""
+        if self.fence:
+            return f"{self.fence}\n"
+        if self.table_head and text.lstrip().startswith("|"):
+            return f"{self.table_head}\n"
+        return ""
+
+    def _track(self, block: str):
+        """Follows fences and tables through a frozen block."""
+        for line in block.split("\n"):
+            stripped = line.strip()
+            if stripped.startswith("```"):
+                self.fence = "" if self.fence else stripped
+                self.table_head, self._last_row = "", None
+            elif self.fence:
+                continue
+            elif stripped.startswith("|"):
+                if self._last_row is not None and not self.table_head and _TABLE_SEPARATOR.match(stripped):
+                    self.table_head = f"{self._last_row}\n{stripped}"
+                self._last_row = stripped
+            else:
+                self.table_head, self._last_row = "", None
+
+    def append(self, text: str):
+        self.tail += text
+        while len(self.tail) > self.block_chars:
+            cut = self._cut()
+            if cut <= 0:
+                break
+            block, self.tail = self.tail[:cut], self.tail[cut + 1:]
+            rendered = self._prefix(block) + block
+            self._track(block)
+            self.tail_placeholder.markdown(f"{rendered}\n```" if self.fence else rendered)
+            self.frozen.append(block)
+            self.frozen_placeholders.append(self.tail_placeholder)
+            self.tail_placeholder = self.container.empty()
+
+    def replace(self, text: str):
+        """Swaps everything streamed so far for the complete message."""
+        for placeholder in self.frozen_placeholders:
+            placeholder.empty()
+        self.tail_placeholder.empty()
+        self.frozen, self.frozen_placeholders, self.tail = [], [], ""
+        self.fence, self.table_head, self._last_row = "", "", None
+        self.tail_placeholder = self.container.empty()
+        self.append(text)
+
+    def render(self, cursor: str = ""):
+        self.tail_placeholder.markdown(self._prefix(self.tail) + self.tail + cursor)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.frozen + [self.tail])
+
+
+@st.cache_resource
+def get_workflow_runner() -> WorkflowRunner:
+    """One background event loop shared by every session in this server process."""
+    return WorkflowRunner(max_concurrent=config.get("max_concurrent_runs", 8))
+
+
+def stream_workflow(prompt: str):
     """
     Streams the workflow output to the Streamlit chat interface.
+    The workflow runs on the shared background loop; this script thread only
+    polls for new messages. Each speaker gets its own segment and only the live
+    tail of the current segment is re-rendered, at most `ui_frame_rate` times per second.
     """
+    frame_interval = 1.0 / config.get("ui_frame_rate", 15)
+    block_chars = config.get("ui_block_chars", 2000)
+
+    job = get_workflow_runner().submit(prompt, st.session_state.agents)
+
     with st.chat_message("assistant"):
-        message_placeholder = st.empty()
-        full_response = ""
-        current_source = ""
-        
-        # Asynchronously iterate through the generator from run_autogen_workflow
-        async for message in run_autogen_workflow(prompt):
-            if message["content"]:
-                # Check if the speaker has changed to add a header
-                if current_source != message["source"]:
-                    current_source = message["source"]
-                    if full_response: # Add space between different agent messages
-                        full_response += "\n\n"
-                    full_response += f"**{current_source}:**\n"
-                
-                full_response += message["content"]
-                message_placeholder.markdown(full_response + "▌")
-                
-        message_placeholder.markdown(full_response)
+        container = st.container()
+        segments = []
+        current = None
+        last_render = 0.0
         
+        # Drain the job's messages as the background loop produces them
+        while not job.done:
+            for message in job.poll(timeout=frame_interval):
+                if not message["content"]:
+                    continue
+
+                # Start a new segment when the speaker changes
+                if current is None or current.source != message["source"]:
+                    if current is not None:
+                        current.render()
+                    current = AgentSegment(container, message["source"], block_chars)
+                    segments.append(current)
+
+                # The complete message replaces the token chunks streamed for it
+                if message.get("replace"):
+                    current.replace(message["content"])
+                else:
+                    current.append(message["content"])
+
+            # Throttle re-renders to a fixed frame rate
+            now = time.monotonic()
+            if current is not None and now - last_render >= frame_interval:
+                current.render("▌")
+                last_render = now
+
+        if current is not None:
+            current.render()
+
+    if job.error is not None:
+        raise job.error
+
+    full_response = "\n\n".join(f"**{segment.source}:**\n{segment.text}" for segment in segments)
+
     # Append the full conversation to session state history
     st.session_state.messages.append({"role": "assistant", "content": full_response})
 
@@ -115,18 +255,13 @@ if num_checked == 0:
     st.warning("Please select at least one agent to proceed.")
 elif prompt := st.chat_input("Enter your requirements here (e.g., 'password reset for online banking')"):
     workflow_successful = False
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
 
     # Add user message to chat history
     st.session_state.messages.append({"role": "user", "content": prompt})
 
     with st.spinner("🤖 Agents are collaborating..."):
         try:
-            loop.run_until_complete(stream_workflow(prompt))
+            stream_workflow(prompt)
             workflow_successful = True
         except Exception as e:
             st.error(f"An error occurred during the workflow. See details below.")
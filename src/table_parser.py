@@ -0,0 +1,306 @@
+"""
+Parses tabular model output (markdown tables, CSV/TSV, either inside a ``` fence) into columns.
+
+    table = parse_table(reply)
+    table.columns, table.column("Expected Result"), list(table.records())
+    for issue in table.issues: print(issue)   # rows that needed recovery
+
+Rows are read once and appended straight into per-column lists. Rows whose
+shape is off are recovered rather than dropped, and every recovery is reported
+in `issues`: wrapped lines and unquoted multi-line cells are joined back to
+their row, surplus cells (e.g. an unescaped pipe or comma inside a cell) are
+folded into the `merge_into` column, short rows are padded, and repeated
+header and separator rows are skipped.
+"""
+import csv
+import io
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Pattern
+
+
+_FENCE = re.compile(r"^[ \t]*```[ \t]*([\w+-]*)[^\n]*\n(.*?)(?:^[ \t]*```[ \t]*$|\Z)", re.MULTILINE | re.DOTALL)
+_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+_BR = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_TABLE_LANGS = {"csv", "tsv", "markdown", "md", "table", "text", ""}
+
+
+@dataclass
+class RowIssue:
+    line: int  # 1-based line in the parsed block
+    action: str  # "continued", "merged", "padded" or "skipped"
+    detail: str
+
+    def __str__(self) -> str:
+        return f"line {self.line}: {self.action} ({self.detail})"
+
+
+@dataclass
+class Table:
+    columns: list[str]
+    values: list[list[str]]  # one list per column
+    format: str  # "markdown", "csv", "tsv" or "empty"
+    issues: list[RowIssue] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.values[0]) if self.values else 0
+
+    def column(self, name: str) -> list[str]:
+        return self.values[self.columns.index(name)]
+
+    def records(self) -> Iterator[dict]:
+        for row in zip(*self.values):
+            yield dict(zip(self.columns, row))
+
+    def to_csv(self) -> str:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(self.columns)
+        writer.writerows(zip(*self.values))
+        return out.getvalue()
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame(dict(zip(self.columns, self.values)), columns=self.columns)
+
+
+# ----------------------------
+# BLOCK SELECTION
+# ----------------------------
+def extract_block(text: str) -> tuple[str, str]:
+    """
+    Returns (body, fence language) of the fenced block holding the table, or
+    (text, "") when there is no fence. An unterminated fence runs to the end.
+    """
+    fallback = None
+    for match in _FENCE.finditer(text):
+        lang, body = match.group(1).lower(), match.group(2)
+        if lang in _TABLE_LANGS and ("|" in body or "," in body or "\t" in body):
+            return body, lang
+        fallback = fallback or (body, lang)
+    return fallback if fallback and not _looks_like_markdown(text) else (text, "")
+
+
+def _looks_like_markdown(text: str) -> bool:
+    lines = text.splitlines()
+    for previous, line in zip(lines, lines[1:]):
+        if "|" in previous and "-" in line and _SEPARATOR.match(line):
+            return True
+    return sum(1 for line in lines if line.lstrip().startswith("|")) >= 2
+
+
+# ----------------------------
+# ROW ASSEMBLY
+# ----------------------------
+class _Builder:
+    """Holds the current record until the next one starts, then appends it column-wise."""
+
+    def __init__(self, columns: list[str], merge_into: int, joiner: str, key: Pattern | None):
+        self.columns = columns
+        self.values: list[list[str]] = [[] for _ in columns]
+        self.issues: list[RowIssue] = []
+        self._width = len(columns)
+        self._merge_into = merge_into
+        self._joiner = joiner
+        self._key = key
+        self._record: list[str] | None = None
+        self._line = 0
+
+    def add(self, cells: list[str], line: int) -> None:
+        record = self._record
+        if (record is not None and len(record) < self._width and len(record) + len(cells) - 1 <= self._width
+                and not (self._key and self._key.match(cells[0]))):
+            # an unquoted line break split this record: the first cell continues the last one
+            record[-1] = f"{record[-1]}\n{cells[0]}" if record[-1] else cells[0]
+            record.extend(cells[1:])
+            self.issues.append(RowIssue(line, "continued", "row joined to the previous one"))
+            return
+        self.flush()
+        self._record, self._line = cells, line
+
+    def continue_last_cell(self, text: str, line: int) -> bool:
+        if self._record is None:
+            return False
+        self._record[-1] = f"{self._record[-1]}\n{text}"
+        self.issues.append(RowIssue(line, "continued", "wrapped line joined to the last cell"))
+        return True
+
+    def flush(self) -> None:
+        record, self._record = self._record, None
+        if record is None:
+            return
+        width = self._width
+        if len(record) > width:
+            surplus = len(record) - width
+            at = self._merge_into
+            record = record[:at] + [self._joiner.join(record[at:at + surplus + 1])] + record[at + surplus + 1:]
+            self.issues.append(RowIssue(self._line, "merged", f"{surplus} surplus cell(s) folded into {self.columns[at]!r}"))
+        elif len(record) < width:
+            self.issues.append(RowIssue(self._line, "padded", f"{width - len(record)} missing cell(s)"))
+            record = record + [""] * (width - len(record))
+        for column, value in zip(self.values, record):
+            column.append(value)
+
+
+def _resolve_merge_into(columns: list[str], merge_into: str | int | None) -> int:
+    if isinstance(merge_into, int):
+        return merge_into
+    if merge_into in columns:
+        return columns.index(merge_into)
+    return len(columns) - 1
+
+
+# ----------------------------
+# MARKDOWN
+# ----------------------------
+def _split_markdown_row(line: str) -> list[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    if "\\" not in line and "`" not in line:
+        cells = line.split("|")
+    else:
+        # escaped pipes and pipes inside `code` spans belong to the cell
+        cells, current, in_code, i = [], [], False, 0
+        while i < len(line):
+            char = line[i]
+            if char == "\\" and i + 1 < len(line) and line[i + 1] == "|":
+                current.append("|")
+                i += 2
+                continue
+            if char == "`":
+                in_code = not in_code
+            if char == "|" and not in_code:
+                cells.append("".join(current))
+                current = []
+            else:
+                current.append(char)
+            i += 1
+        cells.append("".join(current))
+    return [_BR.sub("\n", cell).strip() for cell in cells]
+
+
+def _parse_markdown(lines: list[str], header: Callable, columns: list[str] | None,
+                    merge_into, key: Pattern | None) -> Table:
+    builder: _Builder | None = None
+    raw_header: list[str] | None = None
+    issues: list[RowIssue] = []
+    in_table = after_blank = False
+
+    for number, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if not stripped:
+            after_blank = True
+            continue
+        is_row = "|" in stripped
+        if builder is None:
+            if is_row and not _SEPARATOR.match(stripped):
+                cells = _split_markdown_row(stripped)
+                names = header(cells) if header else cells
+                is_data = names is None and bool(columns)
+                names = list(columns) if is_data else list(names or cells)
+                builder = _Builder(names, _resolve_merge_into(names, merge_into), " | ", key)
+                if is_data:
+                    builder.add(cells, number)
+                else:
+                    raw_header = cells
+                in_table, after_blank = True, False
+            continue
+
+        if not is_row:
+            if in_table and not after_blank:
+                builder.continue_last_cell(stripped, number)
+            else:
+                in_table = False
+            after_blank = False
+            continue
+        after_blank = False
+        if _SEPARATOR.match(stripped):
+            in_table = True
+            continue
+        cells = _split_markdown_row(stripped)
+        if cells == raw_header:
+            issues.append(RowIssue(number, "skipped", "repeated header row"))
+            in_table = True
+            continue
+        if not in_table:
+            # a different table after some prose: not part of this one
+            continue
+        if any(cells):
+            builder.add(cells, number)
+
+    if builder is None:
+        return Table(list(columns or []), [[] for _ in columns or []], "empty")
+    builder.flush()
+    return Table(builder.columns, builder.values, "markdown", sorted(issues + builder.issues, key=lambda i: i.line))
+
+
+# ----------------------------
+# CSV
+# ----------------------------
+def _parse_delimited(body: str, delimiter: str, header: Callable, columns: list[str] | None,
+                     merge_into, key: Pattern | None) -> Table:
+    reader = csv.reader(io.StringIO(body), delimiter=delimiter)
+    rows = [(reader.line_num, row) for row in reader if any(cell.strip() for cell in row)]
+    fmt = "tsv" if delimiter == "\t" else "csv"
+    if not rows:
+        return Table(list(columns or []), [[] for _ in columns or []], "empty")
+
+    # Leading prose ("Here are the test cases:") sits before the header row
+    start, names = 0, None
+    if header:
+        for index, (_, row) in enumerate(rows[:5]):
+            names = header([cell.strip() for cell in row])
+            if names is not None:
+                start = index
+                break
+    else:
+        widths = Counter(len(row) for _, row in rows[:50])
+        modal = widths.most_common(1)[0][0]
+        start = next(index for index, (_, row) in enumerate(rows) if len(row) == modal)
+        names = [cell.strip() for cell in rows[start][1]]
+    issues = [RowIssue(line, "skipped", "text before the header") for line, _ in rows[:start]]
+    if names is None:
+        if not columns:
+            names, start = [cell.strip() for cell in rows[0][1]], 0
+        else:
+            names, start = list(columns), -1
+
+    raw_header = [cell.strip() for cell in rows[start][1]] if start >= 0 else None
+    builder = _Builder(list(names), _resolve_merge_into(list(names), merge_into), delimiter, key)
+    for line, row in rows[start + 1:]:
+        cells = [cell.strip() for cell in row]
+        if cells == raw_header:
+            issues.append(RowIssue(line, "skipped", "repeated header row"))
+            continue
+        builder.add(cells, line)
+    builder.flush()
+    return Table(builder.columns, builder.values, fmt, sorted(issues + builder.issues, key=lambda i: i.line))
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def parse_table(text: str, columns: list[str] | None = None,
+                header: Callable[[list[str]], list[str] | None] | None = None,
+                key: Pattern | None = None, merge_into: str | int | None = None) -> Table:
+    """
+    Parses the first table in `text`.
+
+    `header(cells)` maps a candidate header row to column names, or returns
+    None when the row is data; the table then uses `columns`. Without it the
+    first table row is the header. `key` matches the first cell of a row that
+    starts a new record, so rows not matching it may continue a short record.
+    Surplus cells are folded into `merge_into` (a column name or index;
+    default the last column).
+    """
+    body, lang = extract_block(text)
+    if lang in ("markdown", "md") or (lang not in ("csv", "tsv") and _looks_like_markdown(body)):
+        return _parse_markdown(body.splitlines(), header, columns, merge_into, key)
+    first_line = next((line for line in body.splitlines() if line.strip()), "")
+    delimiter = "\t" if lang == "tsv" or first_line.count("\t") > first_line.count(",") else ","
+    return _parse_delimited(body, delimiter, header, columns, merge_into, key)
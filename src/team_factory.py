@@ -0,0 +1,349 @@
+"""
+Builds the agent team from team_spec.json once and lends it out run after run.
+
+The spec lists each participant's name, provider, system message, tools and
+the sidebar options that select it (variants swap in alternative tools and
+prompts, e.g. "csv" when `test_case_output.structured` is off, or "template"
+when `step_definitions.mode` is "template", which generates step definitions
+from the parsed Gherkin instead of a model turn). Agents, tool
+schemas, model contexts and the team are built the first time a combination
+of selection, team mode, config and model capabilities is needed. Finished
+teams are reset() and kept in an idle pool, so a later run with the same
+combination only rebinds its per-run state.
+
+Per-run state (requirements, ArtifactStore, model client, tracer) lives in a
+RunBinding that the pooled agents and tools read through, so nothing that
+belongs to one run is captured when the team is built.
+"""
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Callable, Literal
+
+from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
+from autogen_agentchat.teams import RoundRobinGroupChat
+from autogen_core.models import ChatCompletionClient
+from autogen_core.tools import FunctionTool
+
+from artifact_store import ArtifactStore
+from context_policy import build_model_context
+from doc_index import DocsMemory, get_docs_memory
+from fan_out_team import FanOutTeam
+from istqb_rules import PrescreenedReviewer, load_rules
+from model_clients import ModelClientWrapper
+from near_duplicates import get_near_duplicate_index
+from step_codegen import StepTemplateAgent
+from step_registry import StepRegistryMemory, get_step_registry
+from table_parser import parse_table
+from termination import ApprovalTermination, build_termination
+from test_case_schema import WriteTestCasesTool
+from tracing import Tracer
+
+
+SPEC_PATH = Path(__file__).parent / "team_spec.json"
+
+_spec_cache: dict = {"mtime": None, "spec": None}
+
+
+def load_team_spec(path: Path = SPEC_PATH) -> dict:
+    """Returns the team spec, re-reading it only when the file has changed on disk."""
+    mtime = path.stat().st_mtime_ns
+    if _spec_cache["mtime"] != mtime:
+        _spec_cache["spec"] = json.loads(path.read_text(encoding="utf-8"))
+        _spec_cache["mtime"] = mtime
+    return _spec_cache["spec"]
+
+
+# ----------------------------
+# PER-RUN BINDING
+# ----------------------------
+class RunBinding:
+    """The state of the run a pooled team is currently lent to."""
+
+    def __init__(self, client: ChatCompletionClient):
+        self.requirements = ""
+        self.store: ArtifactStore | None = None
+        self.client = client
+        self.clients: dict[str, ChatCompletionClient] = {}
+        self._tracer: Tracer | None = None
+
+    def bind(self, requirements: str, store: ArtifactStore, client: ChatCompletionClient, tracer: Tracer | None) -> None:
+        self.requirements = requirements
+        self.store = store
+        self.client = client
+        self.clients = {}
+        self._tracer = tracer
+
+    def client_for(self, agent: str) -> ChatCompletionClient:
+        client = self.clients.get(agent)
+        if client is None:
+            client = self._tracer.wrap_client(self.client, agent) if self._tracer else self.client
+            self.clients[agent] = client
+        return client
+
+
+class BoundModelClient(ModelClientWrapper):
+    """Forwards an agent's model calls to the client bound for the current run."""
+
+    def __init__(self, binding: RunBinding, agent: str):
+        self._binding = binding
+        self._agent = agent
+
+    @property
+    def _client(self) -> ChatCompletionClient:
+        return self._binding.client_for(self._agent)
+
+    async def close(self) -> None:
+        # the bound clients are pooled and owned by model_clients
+        pass
+
+
+# ----------------------------
+# TOOLS
+# ----------------------------
+def make_file_tools(binding: RunBinding) -> dict[str, FunctionTool]:
+    """Builds the write_file and write_java_file tools, writing into the bound run's ArtifactStore."""
+
+    def write_file(content: str, type: Literal["test_case", "step_definition"] = "test_case") -> dict:
+        """Writes test cases or step definitions to disk."""
+        if type == "step_definition":
+            return {"path": str(binding.store.write_text("steps.py", content, kind=type))}
+        # Models often send a markdown table or a fenced block; store a real CSV either way
+        table = parse_table(content)
+        result = {"path": str(binding.store.write_text("Test_Cases.csv", table.to_csv() if len(table) else content, kind=type))}
+        if table.issues:
+            result["recovered_rows"] = [str(issue) for issue in table.issues]
+        return result
+
+    def write_java_file(filename: str, content: str) -> dict:
+        path = binding.store.write_text(f"java/{Path(filename).name}", content, kind="java_step_definition")
+        return {"path": str(path)}
+
+    return {
+        "write_file": FunctionTool(
+            write_file,
+            name="write_file",
+            description="Save CSV test cases or Python step definitions."
+        ),
+        "write_java_file": FunctionTool(
+            write_java_file,
+            name="write_java_file",
+            description="Write Java Step Definition file. Args: filename, content",
+        ),
+    }
+
+
+def make_step_writer(binding: RunBinding, language: str) -> Callable[[str, str], Path]:
+    """Where StepTemplateAgent writes its `name`.py module or java/`name`.java class in the bound run."""
+    if language == "python":
+        return lambda name, content: binding.store.write_text(f"{name}.py", content, kind="step_definition")
+    return lambda name, content: binding.store.write_text(f"java/{name}.java", content, kind="java_step_definition")
+
+
+# ----------------------------
+# TEAM CONSTRUCTION
+# ----------------------------
+@dataclass
+class PooledTeam:
+    team: RoundRobinGroupChat | FanOutTeam
+    binding: RunBinding
+    test_case_tool: WriteTestCasesTool | None = None
+    docs_memory: DocsMemory | None = None
+    runs: int = 0
+
+    def bind(self, requirements: str, store: ArtifactStore, client: ChatCompletionClient, tracer: Tracer | None) -> None:
+        self.binding.bind(requirements, store, client, tracer)
+        if self.test_case_tool is not None:
+            self.test_case_tool.store = store
+        # Pooled teams outlive the build, so edits to ./docs are picked up per run
+        if self.docs_memory is not None and requirements:
+            self.docs_memory.refresh()
+
+
+def selected_participants(spec: dict, agents: dict) -> list[dict]:
+    return [p for p in spec["participants"] if p.get("always") or any(agents.get(key, False) for key in p.get("selected_by", []))]
+
+
+def build_team(spec: dict, agents: dict, team_mode: str, config: dict, client: ChatCompletionClient) -> PooledTeam:
+    """Builds the selected agents and their team from `spec`, reading per-run state through a RunBinding."""
+    binding = RunBinding(client)
+    tools: dict = make_file_tools(binding)
+
+    # Structured mode: the model fills a typed schema through function calling and
+    # the tool validates (with one repair call) and serialises it to CSV.
+    test_case_output = config.get("test_case_output", {})
+    variants = set() if test_case_output.get("structured", True) else {"csv"}
+    # Template mode: step definitions come from the parsed Gherkin, not from a model turn
+    step_definitions = config.get("step_definitions", {})
+    if step_definitions.get("mode") == "template":
+        variants.add("template")
+    test_case_tool = None
+
+    # Top-k ./docs chunks are injected into the context of the agents that need them
+    docs_memory = get_docs_memory(config)
+    retrieval_agents = config.get("retrieval", {}).get("agents", [])
+    # Steps earlier runs defined are skipped by StepTemplateAgent and listed for model-written ones
+    step_registry = get_step_registry(config)
+    # Stream model output token by token instead of one message per agent turn
+    stream_tokens = config.get("stream_tokens", True)
+
+    participants, required_artifacts, by_name = [], [], {}
+    artifacts, reviewers = {}, {}  # agent name -> artifact suffix, reviewed agent -> reviewer
+    for entry in selected_participants(spec, agents):
+        for variant in variants & set(entry.get("variants", {})):
+            entry = {**entry, **entry["variants"][variant]}
+        name = entry["name"]
+
+        if entry.get("provider") == "UserProxyAgent":
+            agent = UserProxyAgent(name, input_func=lambda prompt: binding.requirements)
+        elif entry.get("provider") == "StepTemplateAgent":
+            agent = StepTemplateAgent(
+                name,
+                language=entry.get("language", "java"),
+                write=make_step_writer(binding, entry.get("language", "java")),
+                model_client=BoundModelClient(binding, name) if step_definitions.get("fill_bodies", False) else None,
+                # steps registered by earlier runs are not generated again
+                registry=step_registry,
+                run_id=lambda: binding.store.run_id if binding.store else None
+            )
+        else:
+            agent_client = BoundModelClient(binding, name)
+            agent_tools = []
+            for tool_name in entry.get("tools", []):
+                if tool_name == "write_test_cases" and test_case_tool is None:
+                    test_case_tool = WriteTestCasesTool(
+                        None,
+                        repair_client=agent_client,
+                        strict=test_case_output.get("strict_schema", False),
+                        near_duplicates=get_near_duplicate_index(config),
+                        drop_duplicates=config.get("dedup", {}).get("action", "flag") == "drop"
+                    )
+                agent_tools.append(test_case_tool if tool_name == "write_test_cases" else tools[tool_name])
+            memory = [docs_memory] if docs_memory and name in retrieval_agents else []
+            if step_registry is not None and entry.get("language"):
+                # Model-written step definitions: list the steps earlier runs already define
+                memory.append(StepRegistryMemory(step_registry, entry["language"],
+                                                 run_id=lambda: binding.store.run_id if binding.store else None))
+            agent = AssistantAgent(
+                name=name,
+                model_client=agent_client,
+                memory=memory or None,
+                model_context=build_model_context(name, config, agent_client),
+                model_client_stream=stream_tokens,
+                tools=agent_tools or None,
+                system_message=entry.get("system_message")
+            )
+            # Suites failing the mechanical guideline checks are sent back without a model turn
+            rules = load_rules(config) if entry.get("prescreen") else None
+            if rules is not None:
+                agent = PrescreenedReviewer(agent, rules)
+        participants.append(agent)
+        by_name[name] = agent
+        if entry.get("artifact"):
+            required_artifacts.append(entry["artifact"])
+            artifacts[name] = entry["artifact"]
+        if entry.get("reviews") in by_name:
+            reviewers[entry["reviews"]] = name
+
+    # Stop as soon as the deliverables exist (reviewed ones once approved), or when the token/time budget runs out
+    approvals = {artifacts[writer]: reviewer for writer, reviewer in reviewers.items() if writer in artifacts}
+    termination = build_termination(config, required_artifacts, approvals=approvals)
+    # One pass per agent; extra rounds only run while a deliverable is still missing or unapproved
+    max_rounds = config.get("termination", {}).get("max_rounds", 2) if required_artifacts else 1
+
+    # The writers only consume the head's Gherkin, so they can run side by side
+    head = by_name.get(spec.get("head"))
+    if team_mode == "fan_out" and head is not None:
+        branches = []
+        for agent in participants:
+            if agent is head or isinstance(agent, UserProxyAgent) or agent.name in reviewers.values():
+                continue
+            if agent.name in reviewers:
+                # A reviewed writer and its reviewer take turns within one branch until it approves
+                reviewer = by_name[reviewers[agent.name]]
+                approval = ApprovalTermination(config.get("termination", {}).get("approval_text", "APPROVED"),
+                                               sources=[reviewer.name])
+                agent = RoundRobinGroupChat([agent, reviewer], termination_condition=approval, max_turns=2 * max_rounds)
+            branches.append(agent)
+        team = FanOutTeam(head, branches, termination_condition=termination)
+    else:
+        team = RoundRobinGroupChat(
+            participants,
+            termination_condition=termination,
+            max_turns=len(participants) * max_rounds
+        )
+    return PooledTeam(team, binding, test_case_tool, docs_memory)
+
+
+# ----------------------------
+# POOL
+# ----------------------------
+@dataclass
+class _PoolEntry:
+    loop: asyncio.AbstractEventLoop
+    idle: list[PooledTeam] = field(default_factory=list)
+
+
+class TeamPool:
+    """
+    Idle teams keyed by everything that shapes them. Teams hold asyncio state,
+    so entries are per event loop and dropped once their loop has closed.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple, _PoolEntry] = {}
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+
+    def _key(self, spec: dict, agents: dict, team_mode: str, config: dict, client: ChatCompletionClient) -> tuple:
+        selection = tuple(p["name"] for p in selected_participants(spec, agents))
+        model_info = json.dumps(client.model_info, sort_keys=True, default=str)
+        return (id(asyncio.get_running_loop()), _spec_cache["mtime"], selection, team_mode,
+                json.dumps(config, sort_keys=True, default=str), model_info)
+
+    @asynccontextmanager
+    async def lease(self, agents: dict, team_mode: str, config: dict, client: ChatCompletionClient) -> AsyncIterator[PooledTeam]:
+        """Lends out an idle team for this combination (building one if none is idle) and resets it afterwards."""
+        spec = load_team_spec()
+        loop = asyncio.get_running_loop()
+        key = self._key(spec, agents, team_mode, config, client)
+        with self._lock:
+            for other_key, entry in list(self._entries.items()):
+                if entry.loop.is_closed():
+                    del self._entries[other_key]
+            entry = self._entries.setdefault(key, _PoolEntry(loop))
+            pooled = entry.idle.pop() if entry.idle else None
+        if pooled is None:
+            pooled = build_team(spec, agents, team_mode, config, client)
+            self.built += 1
+        else:
+            self.reused += 1
+
+        # A run cancelled or failing through the lease may leave half-finished state, so its team
+        # is dropped. run_autogen_workflow reports team errors as messages instead of raising,
+        # so those teams come back here normally and reset() clears them like any other run.
+        healthy = False
+        try:
+            yield pooled
+            healthy = True
+        finally:
+            pooled.runs += 1
+            if healthy:
+                try:
+                    await pooled.team.reset()
+                except Exception:
+                    healthy = False
+            if healthy:
+                pooled.bind("", None, pooled.binding.client, None)
+                if pooled.docs_memory is not None:
+                    await pooled.docs_memory.clear()
+                with self._lock:
+                    if len(entry.idle) < config.get("team_pool", {}).get("max_idle", 8):
+                        entry.idle.append(pooled)
+
+
+team_pool = TeamPool()
@@ -0,0 +1,152 @@
+import ast
+import csv
+import re
+from pathlib import Path
+from typing import Sequence
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.conditions import (
+    MaxMessageTermination,
+    TimeoutTermination,
+    TokenUsageTermination,
+)
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage, ToolCallExecutionEvent
+
+
+# ----------------------------
+# ARTIFACT CHECKS
+# ----------------------------
+def is_valid_artifact(path: Path) -> bool:
+    """Cheap sanity check that a tool-written file is a usable deliverable."""
+    if not path.is_file() or path.stat().st_size == 0:
+        return False
+    text = path.read_text(encoding="utf-8", errors="replace")
+    if path.suffix.lower() == ".csv":
+        rows = [row for row in csv.reader(text.splitlines()) if any(cell.strip() for cell in row)]
+        return len(rows) >= 2 and len(rows[0]) >= 2
+    if path.suffix.lower() == ".java":
+        return "class " in text
+    return True
+
+
+def is_approval(text: str, approval_text: str = "APPROVED") -> bool:
+    """
+    True when `text` gives `approval_text` as its verdict: the first or last
+    non-empty line opens with it, after markdown and an optional "Verdict:"
+    label. "NOT APPROVED" or a mention mid-sentence is not an approval.
+    """
+    lines = [line for line in text.strip().splitlines() if line.strip()]
+    verdict = re.compile(rf"[\W_]*(?:[A-Za-z ]{{1,20}}:[\W_]*)?{re.escape(approval_text)}\b")
+    return any(verdict.match(line.strip()) for line in lines[:1] + lines[-1:])
+
+
+class ApprovalTermination(TerminationCondition):
+    """Stops the run once one of `sources` replies with `approval_text` as its verdict (see is_approval())."""
+
+    def __init__(self, approval_text: str = "APPROVED", sources: Sequence[str] | None = None):
+        self._approval_text = approval_text
+        self._sources = set(sources) if sources else None
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if not isinstance(message, BaseChatMessage) or (self._sources and message.source not in self._sources):
+                continue
+            if is_approval(message.to_text(), self._approval_text):
+                self._terminated = True
+                return StopMessage(content=f"{message.source} approved", source="ApprovalTermination")
+        return None
+
+    async def reset(self) -> None:
+        self._terminated = False
+
+
+class ArtifactTermination(TerminationCondition):
+    """
+    Stops the run once a valid file with each of the `required` suffixes
+    (e.g. ".csv", ".java") has been written through a tool call. Paths are read
+    from the tools' {"path": ...} results. `approvals` maps a suffix to the
+    agent reviewing it: such a file only counts once that agent has replied
+    with `approval_text` after the file was last written.
+    """
+
+    def __init__(self, required: Sequence[str], approvals: dict[str, str] | None = None, approval_text: str = "APPROVED"):
+        self._required = {s.lower() for s in required}
+        self._approvals = {s.lower(): agent for s, agent in (approvals or {}).items()}
+        self._approval_text = approval_text
+        self._written: dict[str, str] = {}
+        self._approved: set[str] = set()
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if isinstance(message, BaseChatMessage) and is_approval(message.to_text(), self._approval_text):
+                self._approved |= {s for s, agent in self._approvals.items() if agent == message.source and s in self._written}
+            if not isinstance(message, ToolCallExecutionEvent):
+                continue
+            for result in message.content:
+                try:
+                    # FunctionTool stringifies dict results with str(), not json.dumps()
+                    path = Path(ast.literal_eval(result.content)["path"])
+                except (ValueError, SyntaxError, TypeError, KeyError):
+                    continue
+                if path.suffix.lower() in self._required and is_valid_artifact(path):
+                    self._written[path.suffix.lower()] = str(path)
+                    self._approved.discard(path.suffix.lower())
+
+        done = {s for s in self._written if s not in self._approvals or s in self._approved}
+        if self._required and self._required <= done:
+            self._terminated = True
+            return StopMessage(content=f"Deliverables written: {', '.join(sorted(self._written.values()))}",
+                               source="ArtifactTermination")
+        return None
+
+    async def reset(self) -> None:
+        self._written = {}
+        self._approved = set()
+        self._terminated = False
+
+
+# ----------------------------
+# COMBINED CONDITION
+# ----------------------------
+def build_termination(config: dict, required_artifacts: Sequence[str] = (), approver: str | None = None,
+                      max_messages: int | None = None, approvals: dict[str, str] | None = None) -> TerminationCondition | None:
+    """
+    Combines the deliverable conditions with the budgets from `termination` in config.json.
+
+    The run stops at whichever comes first: every required artifact written
+    (and approved, for the suffixes in `approvals`), `approver` replying with
+    the approval text, the token budget, the wall-clock budget, or `max_messages`.
+    """
+    settings = config.get("termination", {})
+    conditions: list[TerminationCondition] = []
+    if required_artifacts:
+        conditions.append(ArtifactTermination(required_artifacts, approvals, settings.get("approval_text", "APPROVED")))
+    if approver:
+        conditions.append(ApprovalTermination(settings.get("approval_text", "APPROVED"), sources=[approver]))
+    if settings.get("max_total_tokens"):
+        conditions.append(TokenUsageTermination(max_total_token=settings["max_total_tokens"]))
+    if settings.get("timeout_seconds"):
+        conditions.append(TimeoutTermination(settings["timeout_seconds"]))
+    if max_messages:
+        conditions.append(MaxMessageTermination(max_messages))
+
+    if not conditions:
+        return None
+    termination = conditions[0]
+    for condition in conditions[1:]:
+        termination = termination | condition
+    return termination
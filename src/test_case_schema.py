@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+import re
+from typing import Any, Iterator, Mapping
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, SystemMessage, UserMessage
+from autogen_core.tools import BaseTool
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+
+from artifact_store import ArtifactStore
+from near_duplicates import NearDuplicateIndex
+
+
+# ----------------------------
+# SCHEMA
+# ----------------------------
+class TestCase(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    id: str = Field(min_length=1, description="Unique test case ID, e.g. TC_001")
+    name: str = Field(min_length=1, description="Short title of the test case")
+    requirement: str = Field(description="The Scenario or acceptance criterion this test case covers")
+    preconditions: str = Field(description="State required before the first step; 'None' if there is none")
+    steps: list[str] = Field(min_length=1, description="Every action of the test case, in order, one per item")
+    expected_result: str = Field(min_length=1, description="Observable outcome after the last step")
+
+    @field_validator("steps", mode="before")
+    @classmethod
+    def _split_numbered_steps(cls, value: Any) -> Any:
+        # Models often send "1. Open page 2. Submit" as one string.
+        if isinstance(value, str):
+            return [s.strip() for s in re.split(r"(?:^|\s)\d+[.)]\s+", value) if s.strip()]
+        return value
+
+
+class TestCaseSuite(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    test_cases: list[TestCase] = Field(min_length=1, description="One entry per test case, never one per step")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _merge_split_rows(cls, data: Any) -> Any:
+        """Folds consecutive one-row-per-step entries (same id and name) back into one test case."""
+        if not isinstance(data, dict):
+            return data
+        cases = data.get("test_cases")
+        if isinstance(cases, str):
+            try:
+                cases = json.loads(cases)
+            except json.JSONDecodeError:
+                return data
+        if not isinstance(cases, list):
+            return data
+
+        merged: list = []
+        for case in cases:
+            previous = merged[-1] if merged else None
+            if (isinstance(case, dict) and isinstance(previous, dict)
+                    and case.get("id") == previous.get("id") and case.get("name") == previous.get("name")):
+                steps = TestCase._split_numbered_steps(case.get("steps", []))
+                previous["steps"] = list(TestCase._split_numbered_steps(previous.get("steps", []))) + list(steps)
+                previous["expected_result"] = case.get("expected_result") or previous.get("expected_result")
+            else:
+                merged.append(dict(case) if isinstance(case, dict) else case)
+        return {**data, "test_cases": merged}
+
+    @model_validator(mode="after")
+    def _unique_ids(self) -> "TestCaseSuite":
+        seen = set()
+        for case in self.test_cases:
+            if case.id in seen:
+                raise ValueError(f"Duplicate test case id {case.id}; every test case needs its own id")
+            seen.add(case.id)
+        return self
+
+
+CSV_COLUMNS = ["Test Case ID", "Test Case Name", "Requirement", "Preconditions", "Test Steps", "Expected Result"]
+
+
+def csv_rows(suite: TestCaseSuite) -> Iterator[list[str]]:
+    """The header, then one row per test case with the steps numbered inside a single cell."""
+    yield CSV_COLUMNS
+    for case in suite.test_cases:
+        steps = "\n".join(f"{n}. {step}" for n, step in enumerate(case.steps, start=1))
+        yield [case.id, case.name, case.requirement, case.preconditions, steps, case.expected_result]
+
+
+def to_csv(suite: TestCaseSuite) -> str:
+    out = io.StringIO()
+    csv.writer(out).writerows(csv_rows(suite))
+    return out.getvalue()
+
+
+# ----------------------------
+# REPAIR
+# ----------------------------
+REPAIR_PROMPT = """You fix test case JSON so that it validates against this JSON schema:
+
+{schema}
+
+Keep the content; only fix structure, missing fields and duplicate ids.
+Reply with the corrected JSON object only."""
+
+
+def _extract_json(text: str) -> str:
+    start, end = text.find("{"), text.rfind("}")
+    return text[start:end + 1] if start != -1 and end > start else text
+
+
+async def repair_test_cases(client: ChatCompletionClient, args: Mapping[str, Any], error: ValidationError,
+                            cancellation_token: CancellationToken | None = None) -> TestCaseSuite:
+    """
+    One targeted model call that fixes `args` given the validation errors.
+    Uses structured output or JSON mode when the model supports it.
+    Raises ValueError if the repaired output still does not validate.
+    """
+    model_info = client.model_info
+    json_output: Any = None
+    if model_info.get("structured_output"):
+        json_output = TestCaseSuite
+    elif model_info.get("json_output"):
+        json_output = True
+
+    errors = "\n".join(f"- {'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+    result = await client.create(
+        [
+            SystemMessage(content=REPAIR_PROMPT.format(schema=json.dumps(TestCaseSuite.model_json_schema()))),
+            UserMessage(content=f"Invalid test cases:\n{json.dumps(args, default=str)}\n\nValidation errors:\n{errors}", source="repair"),
+        ],
+        json_output=json_output,
+        cancellation_token=cancellation_token,
+    )
+    try:
+        return TestCaseSuite.model_validate_json(_extract_json(str(result.content)))
+    except ValidationError as e:
+        raise ValueError(f"Test cases are still invalid after repair: {e}") from e
+
+
+# ----------------------------
+# TOOL
+# ----------------------------
+class WriteTestCasesTool(BaseTool[TestCaseSuite, dict]):
+    """
+    Typed replacement for write_file(type="test_case"): the model fills in the
+    TestCaseSuite schema through function calling and the tool streams it to a
+    CSV in the run's ArtifactStore.
+
+    Arguments are validated locally. If they do not validate, `repair_client`
+    gets one repair call before the tool gives up and reports the error, so
+    malformed output does not cost another full review turn.
+
+    With `near_duplicates`, each case is checked against every case written
+    before and the matches are returned to the model with the path. When
+    `drop_duplicates` is set they are also left out of the CSV, unless that
+    would leave it empty. Pooled teams point `store` at each run's ArtifactStore.
+    """
+
+    def __init__(self, store: ArtifactStore | None, repair_client: ChatCompletionClient | None = None, strict: bool = False,
+                 near_duplicates: NearDuplicateIndex | None = None, drop_duplicates: bool = False):
+        super().__init__(
+            TestCaseSuite,
+            dict,
+            "write_test_cases",
+            "Save the test cases. Pass one entry per test case with all of its steps in `steps`.",
+            strict=strict,
+        )
+        self.store = store
+        self._repair_client = repair_client
+        self._near_duplicates = near_duplicates
+        self._drop_duplicates = drop_duplicates
+
+    async def run(self, args: TestCaseSuite, cancellation_token: CancellationToken) -> dict:
+        flagged = []
+        if self._near_duplicates is not None:
+            cases = [{"case_id": c.id, "steps": "\n".join(c.steps), "expected_result": c.expected_result} for c in args.test_cases]
+            flagged = self._near_duplicates.check_and_add(cases, namespace=self.store.run_id)
+            duplicate_ids = {f["case_id"] for f in flagged}
+            if self._drop_duplicates and len(duplicate_ids) < len(args.test_cases):
+                args = TestCaseSuite(test_cases=[c for c in args.test_cases if c.id not in duplicate_ids])
+
+        with self.store.open("Test_Cases.csv", kind="test_case") as out:
+            out.writerows(csv_rows(args))
+        result = {"path": str(out.path)}
+        if flagged:
+            result["near_duplicates"] = flagged
+        return result
+
+    async def run_json(self, args: Mapping[str, Any], cancellation_token: CancellationToken, call_id: str | None = None) -> Any:
+        try:
+            suite = TestCaseSuite.model_validate(args)
+        except ValidationError as e:
+            if self._repair_client is None:
+                raise
+            suite = await repair_test_cases(self._repair_client, args, e, cancellation_token)
+        return await self.run(suite, cancellation_token)
@@ -0,0 +1,289 @@
+"""
+Catalogue of every generated test case, in one SQLite database.
+
+    python test_catalogue.py ingest ../outputs
+    python test_catalogue.py search "password reset" --polarity negative
+    python test_catalogue.py export all_cases.parquet
+
+CSV files (and markdown tables) from outputs/ are normalised to one row per test case (header
+aliases, unquoted multi-line steps and one-row-per-step files are repaired on
+the way in). Workflow runs add their CSVs as soon as they are written.
+"""
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from model_clients import load_config
+from table_parser import parse_table
+
+
+COLUMNS = ["case_id", "name", "requirement", "preconditions", "steps", "expected_result"]
+
+_HEADER_ALIASES = {
+    "testcaseid": "case_id", "tcid": "case_id", "id": "case_id", "caseid": "case_id",
+    "testcasename": "name", "name": "name", "title": "name", "testcase": "name",
+    "requirement": "requirement", "requirements": "requirement", "scenario": "requirement", "userstory": "requirement",
+    "preconditions": "preconditions", "precondition": "preconditions",
+    "teststeps": "steps", "steps": "steps",
+    "expectedresult": "expected_result", "expectedresults": "expected_result", "expected": "expected_result",
+}
+_CASE_ID = re.compile(r"^\s*[A-Za-z]{1,6}[-_]?\d+\s*$")
+_STEP_NUMBER = re.compile(r"(?:^|\s)\d+[.)]\s+")
+_NEGATIVE = re.compile(
+    r"\b(invalid|incorrect|wrong|error|fail\w*|unknown|unregistered|expired|locked|denied|reject\w*|"
+    r"empty|blank|missing|negative|not|cannot|unauthori[sz]ed)\b",
+    re.IGNORECASE,
+)
+
+
+# ----------------------------
+# CSV NORMALISATION
+# ----------------------------
+def _header_map(row: list[str]) -> list[str] | None:
+    mapped = [_HEADER_ALIASES.get(re.sub(r"[^a-z]", "", cell.lower())) for cell in row]
+    if "case_id" not in mapped and "name" not in mapped:
+        return None
+    return [column or cell for column, cell in zip(mapped, row)]
+
+
+def read_test_case_csv(text: str) -> list[dict]:
+    """
+    Parses a generated test-case CSV (or markdown table) into dicts with the COLUMNS keys.
+
+    Files without a header are read as the default five columns. Rows that do
+    not start with a test-case ID continue the previous record (models often
+    leave multi-line steps unquoted), surplus cells are folded back into the
+    steps, and consecutive rows sharing an ID and name are merged into one case.
+    """
+    table = parse_table(text, columns=["case_id", "name", "preconditions", "steps", "expected_result"],
+                        header=_header_map, key=_CASE_ID, merge_into="steps")
+    known = [(column, values) for column, values in zip(table.columns, table.values) if column in COLUMNS]
+
+    cases: list[dict] = []
+    for index in range(len(table)):
+        case = {column: "" for column in COLUMNS}
+        for column, values in known:
+            # Some models write a literal backslash-n instead of a line break inside a cell
+            case[column] = values[index].replace("\\n", "\n")
+
+        previous = cases[-1] if cases else None
+        if previous and case["case_id"] == previous["case_id"] and case["name"] == previous["name"]:
+            previous["steps"] = f"{previous['steps']}\n{case['steps']}".strip()
+            previous["expected_result"] = case["expected_result"] or previous["expected_result"]
+        else:
+            cases.append(case)
+    return cases
+
+
+def normalise_text(text: str) -> str:
+    """Lower-cased, whitespace-collapsed text without step numbering."""
+    return re.sub(r"\s+", " ", _STEP_NUMBER.sub(" ", text.lower())).strip()
+
+
+def content_hash(case: dict) -> str:
+    """Same hash for cases that differ only in ID, case, whitespace or step numbering."""
+    key = "|".join(normalise_text(case[c]) for c in ("name", "steps", "expected_result"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def polarity(case: dict) -> str:
+    return "negative" if _NEGATIVE.search(f"{case['name']} {case['expected_result']}") else "positive"
+
+
+# ----------------------------
+# CATALOGUE
+# ----------------------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, run_id TEXT
+);
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL REFERENCES sources(path) ON DELETE CASCADE,
+    case_id TEXT COLLATE NOCASE, name TEXT, requirement TEXT COLLATE NOCASE, preconditions TEXT,
+    steps TEXT, expected_result TEXT, polarity TEXT NOT NULL, content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cases_source ON cases(source);
+CREATE INDEX IF NOT EXISTS cases_case_id ON cases(case_id);
+CREATE INDEX IF NOT EXISTS cases_requirement ON cases(requirement);
+CREATE INDEX IF NOT EXISTS cases_polarity ON cases(polarity);
+CREATE INDEX IF NOT EXISTS cases_content_hash ON cases(content_hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+    name, requirement, steps, expected_result, content='cases', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS cases_ai AFTER INSERT ON cases BEGIN
+    INSERT INTO cases_fts(rowid, name, requirement, steps, expected_result)
+    VALUES (new.id, new.name, new.requirement, new.steps, new.expected_result);
+END;
+CREATE TRIGGER IF NOT EXISTS cases_ad AFTER DELETE ON cases BEGIN
+    INSERT INTO cases_fts(cases_fts, rowid, name, requirement, steps, expected_result)
+    VALUES ('delete', old.id, old.name, old.requirement, old.steps, old.expected_result);
+END;
+"""
+
+
+class TestCatalogue:
+    """
+    SQLite catalogue of test cases with B-tree indexes on test-case ID,
+    requirement, polarity and content hash, plus an FTS5 keyword index.
+
+    ingest_file() is incremental: a file whose mtime and size are unchanged is
+    skipped, a changed file replaces its previous rows. Exact duplicates across
+    files share a content_hash, so search(distinct=True) returns each once.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def ingest_file(self, path: Path, run_id: str | None = None) -> int:
+        """Adds or refreshes one CSV. Returns the number of cases stored (0 if unchanged)."""
+        path = path.resolve()
+        stat = path.stat()
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns, size FROM sources WHERE path = ?", (str(path),)).fetchone()
+            if row and row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+                return 0
+
+        cases = read_test_case_csv(path.read_text(encoding="utf-8", errors="replace"))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM sources WHERE path = ?", (str(path),))
+                self._conn.execute("INSERT INTO sources (path, mtime_ns, size, run_id) VALUES (?, ?, ?, ?)",
+                                   (str(path), stat.st_mtime_ns, stat.st_size, run_id))
+                self._conn.executemany(
+                    "INSERT INTO cases (source, case_id, name, requirement, preconditions, steps, expected_result,"
+                    " polarity, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(str(path), *(c[col] for col in COLUMNS), polarity(c), content_hash(c)) for c in cases],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(cases)
+
+    def ingest_dir(self, root: Path) -> int:
+        """Ingests every CSV under `root`, skipping files already up to date."""
+        total = 0
+        for path in sorted(root.rglob("*.csv")):
+            total += self.ingest_file(path)
+        with self._lock:
+            known = [r["path"] for r in self._conn.execute("SELECT path FROM sources")]
+            gone = [(p,) for p in known if Path(p).is_relative_to(root.resolve()) and not Path(p).exists()]
+            self._conn.executemany("DELETE FROM sources WHERE path = ?", gone)
+        return total
+
+    def search(self, text: str | None = None, requirement: str | None = None, case_id: str | None = None,
+               polarity: str | None = None, distinct: bool = True, limit: int = 100) -> list[dict]:
+        """
+        Filters the catalogue. `text` is matched as keywords (all must appear),
+        `requirement` as a case-insensitive prefix, `case_id` exactly. Each
+        case carries the run_id of its source file (None for backfilled files).
+        """
+        where, params = [], []
+        if text:
+            terms = re.findall(r"\w+", text)
+            if terms:
+                where.append("c.id IN (SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?)")
+                params.append(" ".join(f'"{t}"' for t in terms))
+        if requirement:
+            where.append("c.requirement LIKE ?")
+            params.append(requirement + "%")
+        if case_id:
+            where.append("c.case_id = ?")
+            params.append(case_id)
+        if polarity:
+            where.append("c.polarity = ?")
+            params.append(polarity)
+
+        sql = "SELECT c.*, s.run_id FROM cases c JOIN sources s ON s.path = c.source"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if distinct:
+            sql = f"SELECT * FROM ({sql}) GROUP BY content_hash HAVING id = MIN(id)"
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def duplicates(self) -> list[dict]:
+        """Groups of exact duplicates: content hash, count and the sources they appear in."""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(
+                "SELECT content_hash, COUNT(*) AS count, GROUP_CONCAT(DISTINCT source) AS sources"
+                " FROM cases GROUP BY content_hash HAVING COUNT(*) > 1 ORDER BY count DESC"
+            )]
+
+    def export(self, path: Path) -> int:
+        """Writes every case to .parquet (needs pyarrow) or .csv. Returns the number of rows."""
+        import pandas as pd
+
+        with self._lock:
+            frame = pd.read_sql_query("SELECT * FROM cases ORDER BY id", self._conn)
+        if path.suffix.lower() == ".parquet":
+            try:
+                frame.to_parquet(path, index=False)
+            except ImportError as e:
+                raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from e
+        else:
+            frame.to_csv(path, index=False)
+        return len(frame)
+
+
+_catalogues: dict[str, TestCatalogue] = {}
+_catalogues_lock = threading.Lock()
+
+
+def get_catalogue(config: dict, force: bool = False) -> TestCatalogue | None:
+    """Returns the shared catalogue from `catalogue` in config.json, or None when disabled (unless `force`)."""
+    catalogue_config = config.get("catalogue", {})
+    if not catalogue_config.get("enabled", True) and not force:
+        return None
+    path = (Path(__file__).parent / catalogue_config.get("path", ".cache/test_catalogue.sqlite")).resolve()
+    with _catalogues_lock:
+        if str(path) not in _catalogues:
+            _catalogues[str(path)] = TestCatalogue(path)
+        return _catalogues[str(path)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the catalogue of generated test cases.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Add every CSV under a folder")
+    ingest.add_argument("folder", type=Path, nargs="?", default=Path(__file__).parent.parent / "outputs")
+    search = commands.add_parser("search", help="Filter test cases")
+    search.add_argument("text", nargs="?")
+    search.add_argument("--requirement")
+    search.add_argument("--case-id")
+    search.add_argument("--polarity", choices=["positive", "negative"])
+    search.add_argument("--all", action="store_true", help="Include exact duplicates")
+    search.add_argument("--limit", type=int, default=50)
+    export = commands.add_parser("export", help="Export to .parquet or .csv")
+    export.add_argument("path", type=Path)
+    args = parser.parse_args()
+
+    catalogue = get_catalogue(load_config(), force=True)
+    if args.command == "ingest":
+        print(f"Ingested {catalogue.ingest_dir(args.folder)} test cases from {args.folder}")
+    elif args.command == "search":
+        for case in catalogue.search(args.text, args.requirement, args.case_id, args.polarity,
+                                     distinct=not args.all, limit=args.limit):
+            print(json.dumps({k: case[k] for k in ("case_id", "name", "polarity", "source")}))
+    else:
+        print(f"Exported {catalogue.export(args.path)} test cases to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import AsyncGenerator, Sequence
+
+from autogen_agentchat.messages import BaseChatMessage, ToolCallExecutionEvent, ToolCallRequestEvent
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage
+
+from model_clients import ModelClientWrapper
+
+
+# ----------------------------
+# SPANS
+# ----------------------------
+@dataclass
+class Span:
+    run_id: str
+    kind: str  # "run" | "agent_turn" | "model_call" | "tool"
+    name: str
+    agent: str
+    start: float
+    duration_ms: float = 0.0
+    ttft_ms: float | None = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    attributes: dict = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Collects spans for one workflow run.
+
+    Model-call spans come from per-agent TracingChatCompletionClient wrappers.
+    Agent-turn and tool spans are derived from the team's message stream via
+    observe(), so the agents and tools themselves stay untouched. They are
+    timed by each message's created_at, not by when it reaches the stream:
+    FanOutTeam buffers branches and replays them later. Buffered branch
+    messages carry their turn's start in metadata["turn_started"].
+    """
+
+    def __init__(self, run_id: str | None = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.spans: list[Span] = []
+        self._run_start = time.time()
+        self._turn_start = self._run_start
+        self._pending_tools: dict[str, tuple[str, str, float]] = {}
+        self._turn_tokens = [0, 0]
+
+    def wrap_client(self, client: ChatCompletionClient, agent: str) -> ChatCompletionClient:
+        return TracingChatCompletionClient(client, self, agent)
+
+    def add(self, span: Span) -> None:
+        self.spans.append(span)
+        _metrics.record(span)
+
+    def observe(self, message) -> None:
+        created = getattr(message, "created_at", None)
+        now = created.timestamp() if created else time.time()
+        usage = getattr(message, "models_usage", None)
+        if usage:
+            # Tool-calling turns report usage on the request event, not the final message.
+            self._turn_tokens[0] += usage.prompt_tokens
+            self._turn_tokens[1] += usage.completion_tokens
+
+        if isinstance(message, ToolCallRequestEvent):
+            for call in message.content:
+                self._pending_tools[call.id] = (call.name, message.source, now)
+        elif isinstance(message, ToolCallExecutionEvent):
+            for result in message.content:
+                name, agent, started = self._pending_tools.pop(result.call_id, (result.name, message.source, now))
+                self.add(Span(self.run_id, "tool", name, agent, started,
+                              duration_ms=(now - started) * 1000,
+                              attributes={"is_error": bool(result.is_error)}))
+        elif isinstance(message, BaseChatMessage):
+            started = float(message.metadata.get("turn_started", self._turn_start))
+            self.add(Span(self.run_id, "agent_turn", message.source, message.source, started,
+                          duration_ms=max(now - started, 0.0) * 1000,
+                          prompt_tokens=self._turn_tokens[0],
+                          completion_tokens=self._turn_tokens[1]))
+            self._turn_start = max(self._turn_start, now)
+            self._turn_tokens = [0, 0]
+
+    def finish(self, path: Path) -> None:
+        """Adds the overall run span and appends every span to the JSONL trace file."""
+        model_calls = [s for s in self.spans if s.kind == "model_call"]
+        self.add(Span(self.run_id, "run", "run_autogen_workflow", "", self._run_start,
+                      duration_ms=(time.time() - self._run_start) * 1000,
+                      prompt_tokens=sum(s.prompt_tokens for s in model_calls),
+                      completion_tokens=sum(s.completion_tokens for s in model_calls)))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _write_lock, path.open("a", encoding="utf-8") as f:
+            for span in self.spans:
+                f.write(json.dumps(asdict(span)) + "\n")
+
+    def summary(self) -> dict:
+        """Wall time and tokens per agent, for display at the end of a run."""
+        per_agent: dict[str, dict] = {}
+        for span in self.spans:
+            if span.kind != "model_call":
+                continue
+            agent = per_agent.setdefault(span.agent, {"calls": 0, "duration_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+            agent["calls"] += 1
+            agent["duration_ms"] += span.duration_ms
+            agent["prompt_tokens"] += span.prompt_tokens
+            agent["completion_tokens"] += span.completion_tokens
+        return per_agent
+
+
+_write_lock = threading.Lock()
+
+
+class TracingChatCompletionClient(ModelClientWrapper):
+    def __init__(self, client: ChatCompletionClient, tracer: Tracer, agent: str):
+        super().__init__(client)
+        self._tracer = tracer
+        self._agent = agent
+
+    def _span(self, wall_start: float, started: float, result: CreateResult, ttft: float | None) -> None:
+        duration = time.perf_counter() - started
+        self._tracer.add(Span(
+            self._tracer.run_id, "model_call", "create", self._agent, wall_start,
+            duration_ms=duration * 1000,
+            ttft_ms=(ttft if ttft is not None else duration) * 1000,
+            prompt_tokens=result.usage.prompt_tokens,
+            completion_tokens=result.usage.completion_tokens,
+            attributes={"cached": result.cached, "finish_reason": result.finish_reason},
+        ))
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs) -> CreateResult:
+        wall_start, started = time.time(), time.perf_counter()
+        result = await self._client.create(messages, **kwargs)
+        self._span(wall_start, started, result, None)
+        return result
+
+    async def create_stream(self, messages: Sequence[LLMMessage], **kwargs) -> AsyncGenerator[str | CreateResult, None]:
+        wall_start, started = time.time(), time.perf_counter()
+        ttft = None
+        async for chunk in self._client.create_stream(messages, **kwargs):
+            if isinstance(chunk, CreateResult):
+                self._span(wall_start, started, chunk, ttft)
+            elif ttft is None:
+                ttft = time.perf_counter() - started
+            yield chunk
+
+
+# ----------------------------
+# PROMETHEUS EXPORT
+# ----------------------------
+class _Metrics:
+    """Process-wide counters rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, str, str], float] = {}
+
+    def _inc(self, metric: str, kind: str, name: str, value: float) -> None:
+        key = (metric, kind, name)
+        self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def record(self, span: Span) -> None:
+        label = span.agent if span.kind == "model_call" else span.name
+        with self._lock:
+            self._inc("qe_spans_total", span.kind, label, 1)
+            self._inc("qe_span_duration_seconds_sum", span.kind, label, span.duration_ms / 1000)
+            self._inc("qe_prompt_tokens_total", span.kind, label, span.prompt_tokens)
+            self._inc("qe_completion_tokens_total", span.kind, label, span.completion_tokens)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for metric in sorted({k[0] for k in self._counters}):
+                lines.append(f"# TYPE {metric} counter")
+                for (m, kind, name), value in sorted(self._counters.items()):
+                    if m == metric:
+                        lines.append(f'{metric}{{kind="{kind}",name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+_metrics = _Metrics()
+_server: ThreadingHTTPServer | None = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = _metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int) -> None:
+    """Serves /metrics on `port` from a daemon thread. Safe to call more than once."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return
+        _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()